@@ -358,9 +358,8 @@ def schema_cmd(options):
         return
 
     load_resources()
-    resource_mapping = schema.resource_vocabulary()
     if options.summary:
-        schema.summary(resource_mapping)
+        schema.summary(schema.resource_vocabulary())
         return
 
     # Here are the formats for what we accept:
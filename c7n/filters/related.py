@@ -44,9 +44,17 @@ class RelatedResourceFilter(ValueFilter):
                 "%s Filter requires resource manager spec" % name)
         return super(RelatedResourceFilter, self).validate()
 
+    @classmethod
+    def get_related_ids_expression(cls):
+        # Compiled once per filter class, as it is evaluated per resource.
+        expr = cls.__dict__.get('_related_ids_expression')
+        if expr is None:
+            expr = jmespath.compile("[].%s" % cls.RelatedIdsExpression)
+            cls._related_ids_expression = expr
+        return expr
+
     def get_related_ids(self, resources):
-        return set(jmespath.search(
-            "[].%s" % self.RelatedIdsExpression, resources))
+        return set(self.get_related_ids_expression().search(resources))
 
     def get_related(self, resources):
         resource_manager = self.get_resource_manager()
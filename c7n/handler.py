@@ -19,28 +19,71 @@ an event.
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import errno
 import os
 import uuid
 import logging
-import json
 
 from c7n.policy import PolicyCollection
 from c7n.resources import load_resources
-from c7n.utils import format_event, get_account_id_from_sts
+from c7n.utils import format_event, get_account_id_from_sts, loads
 from c7n.config import Config
 
 import boto3
 
-logging.root.setLevel(logging.DEBUG)
+logging.root.setLevel(os.environ.get('C7N_LOG_LEVEL', 'INFO').upper())
 logging.getLogger('botocore').setLevel(logging.WARNING)
 logging.getLogger('urllib3').setLevel(logging.WARNING)
 log = logging.getLogger('custodian.lambda')
 
 account_id = None
+policy_config = None
 
-# On cold start load all resources, requires a pythonpath directory scan
+
+def load_policy_config():
+    """Parse the policy file bundled with the lambda once per container."""
+    global policy_config
+    if policy_config is None:
+        with open('config.json', 'rb') as f:
+            policy_config = loads(f.read())
+    return policy_config
+
+
+def init_cold_start():
+    """Front load policy, resource and account loading into lambda init.
+
+    Work done at module scope runs once per container rather than on
+    every invocation, failures here fall back to the lazy resolution
+    in dispatch_event.
+    """
+    global account_id
+
+    try:
+        policy_config = load_policy_config()
+    except (IOError, ValueError) as e:
+        log.warning("Unable to preload policy config: %s", e)
+        load_resources()
+        return
+
+    policies = policy_config and policy_config.get('policies') or ()
+    # Only import the resource modules our policies use.
+    load_resources(set(p['resource'] for p in policies))
+
+    options = {}
+    if policies:
+        options = policies[0].get('mode', {}).get('execution-options', {})
+    if 'assume_role' in options:
+        return
+
+    try:
+        account_id = get_account_id_from_sts(boto3.Session())
+    except Exception as e:
+        log.warning("Unable to preload account id: %s", e)
+
+
+# On cold start load the policy and its resources
 if 'AWS_EXECUTION_ENV' in os.environ:
-    load_resources()
+    init_cold_start()
 
 
 def dispatch_event(event, context):
@@ -52,13 +95,14 @@ def dispatch_event(event, context):
         log.debug("Skipping failed operation: %s" % error)
         return
 
-    event['debug'] = True
-    if event['debug']:
+    # Serializing the full event is costly on every warm invocation,
+    # only do so when explicitly asked for.
+    if os.environ.get('C7N_DEBUG_EVENT'):
+        event['debug'] = True
         log.info("Processing event\n %s", format_event(event))
 
     # Policies file should always be valid in lambda so do loading naively
-    with open('config.json') as f:
-        policy_config = json.load(f)
+    policy_config = load_policy_config()
 
     if not policy_config or not policy_config.get('policies'):
         return False
@@ -66,18 +110,16 @@ def dispatch_event(event, context):
     # Initialize output directory, we've seen occassional perm issues with
     # lambda on temp directory and changing unix execution users, so
     # use a per execution temp space.
-    output_dir = os.environ.get(
-        'C7N_OUTPUT_DIR',
-        '/tmp/' + str(uuid.uuid4()))
-    if not os.path.exists(output_dir):
-        try:
-            os.mkdir(output_dir)
-        except OSError as error:
+    output_dir = os.environ.get('C7N_OUTPUT_DIR') or '/tmp/' + uuid.uuid4().hex
+    try:
+        os.mkdir(output_dir)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
             log.warning("Unable to make output directory: {}".format(error))
 
     # TODO. This enshrines an assumption of a single policy per lambda.
-    options_overrides = policy_config[
-        'policies'][0].get('mode', {}).get('execution-options', {})
+    options_overrides = dict(policy_config[
+        'policies'][0].get('mode', {}).get('execution-options', {}))
 
     # if using assume role in lambda ensure that the correct
     # execution account is captured in options.
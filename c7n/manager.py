@@ -82,6 +82,12 @@ class ResourceManager(object):
 
         provider_resources = clouds[provider_name].resources
         klass = provider_resources.get(resource_type)
+        if klass is None and provider_name == 'aws':
+            # a targeted resource load (lambda cold start) only imports the
+            # policy's own resource modules, fall back to loading them all.
+            from c7n.resources import load_resources
+            load_resources()
+            klass = provider_resources.get(resource_type)
         if klass is None:
             raise ValueError(resource_type)
 
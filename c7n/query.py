@@ -18,9 +18,9 @@ tags_spec -> s3, elb, rds
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from collections import OrderedDict
 import functools
 import itertools
-import json
 from concurrent.futures import as_completed
 
 import jmespath
@@ -34,7 +34,7 @@ from c7n.manager import ResourceManager
 from c7n.registry import PluginRegistry
 from c7n.tags import register_ec2_tags, register_universal_tags
 from c7n.utils import (
-    local_session, generate_arn, get_retry, chunks, camelResource)
+    local_session, generate_arn, get_retry, chunks, camelResource, loads)
 
 
 try:
@@ -45,6 +45,24 @@ except ImportError:
         pass
 
 
+_default_retry = get_retry((
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'Throttled',
+    'Throttling',
+    'Client.RequestLimitExceeded'))
+
+_compiled_paths = {}
+
+
+def _compile_path(path):
+    """Compile a jmespath expression once, enum spec paths are constant."""
+    expr = _compiled_paths.get(path)
+    if expr is None:
+        expr = _compiled_paths[path] = jmespath.compile(path)
+    return expr
+
+
 class ResourceQuery(object):
 
     def __init__(self, session_factory):
@@ -70,8 +88,7 @@ class ResourceQuery(object):
             data = op(**params)
 
         if path:
-            path = jmespath.compile(path)
-            data = path.search(data)
+            data = _compile_path(path).search(data)
 
         return data
 
@@ -108,7 +125,8 @@ class ResourceQuery(object):
         if client_filter:
             # This logic was added to prevent the issue from:
             # https://github.com/capitalone/cloud-custodian/issues/1398
-            if all(map(lambda r: isinstance(r, six.string_types), resources)):
+            identities = set(identities)
+            if all(isinstance(r, six.string_types) for r in resources):
                 resources = [r for r in resources if r in identities]
             else:
                 resources = [r for r in resources if r[m.id] in identities]
@@ -142,7 +160,9 @@ class ChildResourceQuery(ResourceQuery):
 
         parent_type, parent_key, annotate_parent = m.parent_spec
         parents = self.manager.get_resource_manager(parent_type)
-        parent_ids = [p[parents.resource_type.id] for p in parents.resources()]
+        # Parents may repeat, only query children once per parent.
+        parent_ids = list(OrderedDict.fromkeys(
+            p[parents.resource_type.id] for p in parents.resources()))
 
         # Bail out with no parent ids...
         existing_param = parent_key in params
@@ -155,10 +175,13 @@ class ChildResourceQuery(ResourceQuery):
 
         # Have to query separately for each parent's children.
         results = []
-        for parent_id in parent_ids:
-            merged_params = self.get_parent_parameters(params, parent_id, parent_key)
-            subset = self._invoke_client_enum(
-                client, enum_op, merged_params, path, retry=self.manager.retry)
+        get_children = functools.partial(
+            self._get_children, client, enum_op, params, path, parent_key)
+        with self.manager.executor_factory(
+                max_workers=self.manager.max_workers) as w:
+            subsets = list(w.map(get_children, parent_ids))
+
+        for parent_id, subset in zip(parent_ids, subsets):
             if annotate_parent:
                 for r in subset:
                     r[self.parent_key] = parent_id
@@ -168,6 +191,11 @@ class ChildResourceQuery(ResourceQuery):
                 results.extend(subset)
         return results
 
+    def _get_children(self, client, enum_op, params, path, parent_key, parent_id):
+        merged_params = self.get_parent_parameters(params, parent_id, parent_key)
+        return self._invoke_client_enum(
+            client, enum_op, merged_params, path, retry=self.manager.retry)
+
     def get_parent_parameters(self, params, parent_id, parent_key):
         return dict(params, **{parent_key: parent_id})
 
@@ -205,8 +233,14 @@ class QueryMeta(type):
         return super(QueryMeta, cls).__new__(cls, name, parents, attrs)
 
 
+_api_names = {}
+
+
 def _napi(op_name):
-    return op_name.title().replace('_', '')
+    name = _api_names.get(op_name)
+    if name is None:
+        name = _api_names[op_name] = op_name.title().replace('_', '')
+    return name
 
 
 sources = PluginRegistry('sources')
@@ -278,27 +312,40 @@ class ConfigSource(object):
         self.manager = manager
 
     def get_permissions(self):
-        return ["config:GetResourceConfigHistory",
+        return ["config:BatchGetResourceConfig",
+                "config:GetResourceConfigHistory",
                 "config:ListDiscoveredResources"]
 
     def get_resources(self, ids, cache=True):
         client = local_session(self.manager.session_factory).client('config')
         results = []
         m = self.manager.get_model()
-        for i in ids:
-            revisions = self.retry(
-                client.get_resource_config_history,
-                resourceId=i,
-                resourceType=m.config_type,
-                limit=1).get('configurationItems')
-            if not revisions:
-                continue
-            results.append(self.load_resource(revisions[0]))
+        for id_set in chunks(ids, 100):
+            items = self.retry(
+                client.batch_get_resource_config,
+                resourceKeys=[
+                    {'resourceType': m.config_type, 'resourceId': i}
+                    for i in id_set]).get('baseConfigurationItems', ())
+            items = {item['resourceId']: item for item in items}
+            for i in id_set:
+                item = items.get(i)
+                # Deleted or unprocessed resources aren't returned by
+                # the batch api, fall back to their config history.
+                if item is None:
+                    revisions = self.retry(
+                        client.get_resource_config_history,
+                        resourceId=i,
+                        resourceType=m.config_type,
+                        limit=1).get('configurationItems')
+                    if not revisions:
+                        continue
+                    item = revisions[0]
+                results.append(self.load_resource(item))
         return list(filter(None, results))
 
     def load_resource(self, item):
         if isinstance(item['configuration'], six.string_types):
-            item_config = json.loads(item['configuration'])
+            item_config = loads(item['configuration'])
         else:
             item_config = item['configuration']
         return camelResource(item_config)
@@ -307,8 +354,10 @@ class ConfigSource(object):
         client = local_session(self.manager.session_factory).client('config')
         paginator = client.get_paginator('list_discovered_resources')
         paginator.PAGE_ITERATOR_CLS = RetryPageIterator
+        # The paginator for this operation has no limit key, so request
+        # the api maximum page size directly.
         pages = paginator.paginate(
-            resourceType=self.manager.get_model().config_type)
+            resourceType=self.manager.get_model().config_type, limit=100)
         results = []
 
         with self.manager.executor_factory(max_workers=5) as w:
@@ -320,15 +369,16 @@ class ConfigSource(object):
                 len(resource_ids),
                 self.manager.__class__.__name__.lower())
 
+            futures = []
             for resource_set in chunks(resource_ids, 50):
-                futures = []
                 futures.append(w.submit(self.get_resources, resource_set))
-                for f in as_completed(futures):
-                    if f.exception():
-                        self.manager.log.error(
-                            "Exception getting resources from config \n %s" % (
-                                f.exception()))
-                    results.extend(f.result())
+
+            for f in as_completed(futures):
+                if f.exception():
+                    self.manager.log.error(
+                        "Exception getting resources from config \n %s" % (
+                            f.exception()))
+                results.extend(f.result())
         return results
 
     def augment(self, resources):
@@ -340,8 +390,6 @@ class QueryResourceManager(ResourceManager):
 
     resource_type = ""
 
-    retry = None
-
     # TODO Check if we can move to describe source
     max_workers = 3
     chunk_size = 20
@@ -350,17 +398,15 @@ class QueryResourceManager(ResourceManager):
 
     _generate_arn = None
 
-    retry = staticmethod(
-        get_retry((
-            'ThrottlingException',
-            'RequestLimitExceeded',
-            'Throttled',
-            'Throttling',
-            'Client.RequestLimitExceeded')))
+    retry = staticmethod(_default_retry)
 
     def __init__(self, data, options):
         super(QueryResourceManager, self).__init__(data, options)
         self.source = self.get_source(self.source_type)
+        self._cache_key = {
+            'account': self.account_id,
+            'region': self.config.region,
+            'resource': str(self.__class__.__name__)}
 
     @property
     def source_type(self):
@@ -388,12 +434,7 @@ class QueryResourceManager(ResourceManager):
         return perms
 
     def get_cache_key(self, query):
-        return {
-            'account': self.account_id,
-            'region': self.config.region,
-            'resource': str(self.__class__.__name__),
-            'q': query
-        }
+        return dict(self._cache_key, q=query)
 
     def resources(self, query=None):
         cache_key = self.get_cache_key(query)
@@ -496,21 +537,15 @@ class QueryResourceManager(ResourceManager):
         return self.config.region
 
     def get_arns(self, resources):
-        arns = []
-
         m = self.get_model()
         arn_key = getattr(m, 'arn', None)
-        id_key = m.id
+        if arn_key:
+            return [r[arn_key] for r in resources]
 
-        for r in resources:
-            _id = r[id_key]
-            if arn_key:
-                arns.append(r[arn_key])
-            elif 'arn' in _id[:3]:
-                arns.append(_id)
-            else:
-                arns.append(self.generate_arn(_id))
-        return arns
+        id_key = m.id
+        return [
+            r[id_key] if r[id_key].startswith('arn') else self.generate_arn(r[id_key])
+            for r in resources]
 
     @property
     def generate_arn(self):
@@ -588,7 +623,7 @@ def _scalar_augment(manager, model, detail_spec, resource_set):
 
 class RetryPageIterator(PageIterator):
 
-    retry = staticmethod(QueryResourceManager.retry)
+    retry = staticmethod(_default_retry)
 
     def _make_request(self, current_kwargs):
         return self.retry(self._method, **current_kwargs)
@@ -16,18 +16,184 @@
 #
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import importlib
 import time
 
 
 LOADED = False
 
+# Resource type to the c7n.resources modules that need to be
+# imported to provide it along with its filters and actions.
+RESOURCE_MODULE_MAP = {
+    'account': ('account',),
+    'acm-certificate': ('acm',),
+    'alarm': ('cw',),
+    'ami': ('ami',),
+    'app-elb': ('appelb',),
+    'app-elb-target-group': ('appelb',),
+    'asg': ('asg',),
+    'backup-plan': ('backup',),
+    'batch-compute': ('batch',),
+    'batch-definition': ('batch',),
+    'cache-cluster': ('elasticache',),
+    'cache-snapshot': ('elasticache',),
+    'cache-subnet-group': ('elasticache',),
+    'cfn': ('cfn',),
+    'cloud-directory': ('directory',),
+    'cloudhsm-cluster': ('hsm',),
+    'cloudsearch': ('cloudsearch',),
+    'cloudtrail': ('cloudtrail',),
+    'codebuild': ('code',),
+    'codecommit': ('code',),
+    'codepipeline': ('code',),
+    'config-rule': ('config',),
+    'customer-gateway': ('vpc',),
+    'datapipeline': ('datapipeline',),
+    'dax': ('dynamodb',),
+    'directconnect': ('directconnect',),
+    'directory': ('directory',),
+    'distribution': ('cloudfront',),
+    'dlm-policy': ('dlm',),
+    'dms-endpoint': ('dms',),
+    'dms-instance': ('dms',),
+    'dynamodb-backup': ('dynamodb',),
+    'dynamodb-stream': ('dynamodb',),
+    'dynamodb-table': ('dynamodb',),
+    'ebs': ('ebs',),
+    'ebs-snapshot': ('ebs',),
+    'ec2': ('ec2', 'ssm'),
+    'ec2-reserved': ('ec2',),
+    'ecr': ('ecr',),
+    'ecs': ('ecs',),
+    'ecs-container-instance': ('ecs',),
+    'ecs-service': ('ecs',),
+    'ecs-task': ('ecs',),
+    'ecs-task-definition': ('ecs',),
+    'efs': ('efs',),
+    'efs-mount-target': ('efs',),
+    'eks': ('eks',),
+    'elasticbeanstalk': ('elasticbeanstalk',),
+    'elasticbeanstalk-environment': ('elasticbeanstalk',),
+    'elasticsearch': ('elasticsearch',),
+    'elb': ('elb',),
+    'emr': ('emr',),
+    'eni': ('vpc',),
+    'event-rule': ('cw',),
+    'event-rule-target': ('cw',),
+    'firehose': ('kinesis',),
+    'fsx': ('fsx',),
+    'fsx-backup': ('fsx',),
+    'gamelift-build': ('gamelift',),
+    'gamelift-fleet': ('gamelift',),
+    'glacier': ('glacier',),
+    'glue-connection': ('glue',),
+    'glue-dev-endpoint': ('glue',),
+    'health-event': ('health',),
+    'healthcheck': ('route53',),
+    'hostedzone': ('route53',),
+    'hsm': ('hsm',),
+    'hsm-client': ('hsm',),
+    'hsm-hapg': ('hsm',),
+    'iam-certificate': ('iam',),
+    'iam-group': ('iam',),
+    'iam-policy': ('iam',),
+    'iam-profile': ('iam',),
+    'iam-role': ('iam',),
+    'iam-user': ('iam',),
+    'identity-pool': ('cognito',),
+    'internet-gateway': ('vpc',),
+    'iot': ('iot',),
+    'kafka': ('kafka',),
+    'key-pair': ('vpc',),
+    'kinesis': ('kinesis',),
+    'kinesis-analytics': ('kinesis',),
+    'kms': ('kms',),
+    'kms-key': ('kms',),
+    'lambda': ('awslambda',),
+    'lambda-layer': ('awslambda',),
+    'launch-config': ('asg',),
+    'launch-template-version': ('ec2',),
+    'lightsail-db': ('lightsail',),
+    'lightsail-elb': ('lightsail',),
+    'lightsail-instance': ('lightsail',),
+    'log-group': ('cw',),
+    'message-broker': ('mq',),
+    'ml-model': ('ml',),
+    'nat-gateway': ('vpc',),
+    'network-acl': ('vpc',),
+    'network-addr': ('vpc',),
+    'opswork-cm': ('opsworks',),
+    'opswork-stack': ('opsworks',),
+    'peering-connection': ('vpc',),
+    'r53domain': ('route53',),
+    'rds': ('rds',),
+    'rds-cluster': ('rdscluster',),
+    'rds-cluster-param-group': ('rdsparamgroup',),
+    'rds-cluster-snapshot': ('rdscluster',),
+    'rds-param-group': ('rdsparamgroup',),
+    'rds-snapshot': ('rds',),
+    'rds-subnet-group': ('rds',),
+    'rds-subscription': ('rds',),
+    'redshift': ('redshift',),
+    'redshift-snapshot': ('redshift',),
+    'redshift-subnet-group': ('redshift',),
+    'rest-account': ('apigw',),
+    'rest-api': ('apigw',),
+    'rest-resource': ('apigw',),
+    'rest-stage': ('apigw',),
+    'rest-vpclink': ('apigw',),
+    'route-table': ('vpc',),
+    'rrset': ('route53',),
+    's3': ('s3',),
+    'sagemaker-endpoint': ('sagemaker',),
+    'sagemaker-endpoint-config': ('sagemaker',),
+    'sagemaker-job': ('sagemaker',),
+    'sagemaker-model': ('sagemaker',),
+    'sagemaker-notebook': ('sagemaker',),
+    'sagemaker-transform-job': ('sagemaker',),
+    'secrets-manager': ('secretsmanager',),
+    'security-group': ('vpc',),
+    'shield-attack': ('shield',),
+    'shield-protection': ('shield',),
+    'simpledb': ('simpledb',),
+    'snowball': ('snowball',),
+    'snowball-cluster': ('snowball',),
+    'sns': ('sns',),
+    'sqs': ('sqs',),
+    'ssm-activation': ('ssm',),
+    'ssm-managed-instance': ('ssm',),
+    'ssm-parameter': ('ssm',),
+    'step-machine': ('sfn',),
+    'storage-gateway': ('storagegw',),
+    'streaming-distribution': ('cloudfront',),
+    'subnet': ('vpc',),
+    'support-case': ('support',),
+    'transit-attachment': ('vpc',),
+    'transit-gateway': ('vpc',),
+    'user-pool': ('cognito',),
+    'vpc': ('vpc',),
+    'vpc-endpoint': ('vpc',),
+    'vpn-connection': ('vpc',),
+    'vpn-gateway': ('vpc',),
+    'waf': ('vpc', 'waf'),
+    'waf-regional': ('vpc', 'waf'),
+}
 
-def load_resources():
 
+def load_resources(resource_types=None):
+    """Load aws resources.
+
+    :param resource_types: Optionally only import the modules providing
+       these resource types, any type missing from RESOURCE_MODULE_MAP
+       results in all resources being loaded.
+    """
     global LOADED
     if LOADED:
         return
 
+    if resource_types is not None and _load_resource_modules(resource_types):
+        return
+
     import c7n.resources.account
     import c7n.resources.acm
     import c7n.resources.ami
@@ -97,9 +263,27 @@ def load_resources():
     import c7n.resources.waf
     import c7n.resources.fsx
 
+    _load_plugins()
+    LOADED = True
+
+
+def _load_resource_modules(resource_types):
+    modules = set()
+    for rtype in resource_types:
+        if rtype.startswith('aws.'):
+            rtype = rtype[4:]
+        if rtype not in RESOURCE_MODULE_MAP:
+            return False
+        modules.update(RESOURCE_MODULE_MAP[rtype])
+
+    for m in sorted(modules):
+        importlib.import_module('c7n.resources.%s' % m)
+    _load_plugins()
+    return True
+
+
+def _load_plugins():
     # Load external plugins (private sdks etc)
     from c7n.manager import resources
     resources.load_plugins()
     resources.notify(resources.EVENT_FINAL)
-
-    LOADED = True
@@ -81,8 +81,14 @@ class ConfigLambda(query.ConfigSource):
 
     def load_resource(self, item):
         resource = super(ConfigLambda, self).load_resource(item)
+        item_tags = item.get('tags')
+        # Batch config items only carry tags in supplementary config
+        if item_tags is None:
+            item_tags = item['supplementaryConfiguration'].get('Tags', {})
+            if isinstance(item_tags, six.string_types):
+                item_tags = json.loads(item_tags)
         resource['Tags'] = [
-            {u'Key': k, u'Value': v} for k, v in item.get('tags', {}).items()]
+            {u'Key': k, u'Value': v} for k, v in item_tags.items()]
         resource['c7n:Policy'] = item[
             'supplementaryConfiguration'].get('Policy')
         return resource
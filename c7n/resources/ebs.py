@@ -42,6 +42,7 @@ from c7n.utils import (
     set_annotation,
     type_schema,
     QueryParser,
+    worker,
 )
 from c7n.resources.ami import AMI
 
@@ -1442,7 +1443,7 @@ class ModifyVolume(BaseAction):
     schema = type_schema(
         'modify',
         **{'volume-type': {'enum': ['io1', 'gp2', 'st1', 'sc1']},
-           'shrink': False,
+           'shrink': {'type': 'boolean'},
            'size-percent': {'type': 'number'},
            'iops-percent': {'type': 'number'}})
 
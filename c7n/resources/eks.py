@@ -13,6 +13,10 @@
 # limitations under the License.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import functools
+
+from botocore.exceptions import ClientError
+
 from c7n.actions import Action
 from c7n.filters.vpc import SecurityGroupFilter, SubnetFilter, VpcFilter
 from c7n.manager import resources
@@ -57,10 +61,14 @@ class Delete(Action):
     schema = type_schema('delete')
     permissions = ('eks:DeleteCluster',)
 
+    def delete_cluster(self, client, r):
+        try:
+            client.delete_cluster(name=r['name'])
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ResourceNotFoundException':
+                raise
+
     def process(self, resources):
         client = local_session(self.manager.session_factory).client('eks')
-        for r in resources:
-            try:
-                client.delete_cluster(name=r['name'])
-            except client.exceptions.ResourceNotFoundException:
-                continue
+        with self.executor_factory(max_workers=3) as w:
+            list(w.map(functools.partial(self.delete_cluster, client), resources))
@@ -16,17 +16,18 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import logging
 import functools
 
-from concurrent.futures import as_completed
+from botocore.client import Config
+from collections import OrderedDict
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 
 from c7n.actions import BaseAction
 from c7n.filters import AgeFilter, OPERATORS
 import c7n.filters.vpc as net_filters
 from c7n.manager import resources
-from c7n.query import QueryResourceManager
+from c7n.query import QueryResourceManager, DescribeSource, RetryPageIterator
 from c7n import tags
 from c7n.utils import (
-    type_schema, local_session, snapshot_identifier, chunks,
-    get_retry, generate_arn)
+    type_schema, local_session, snapshot_identifier, chunks, generate_arn)
 
 log = logging.getLogger('custodian.rds-cluster')
 
@@ -47,7 +48,12 @@ class RDSCluster(QueryResourceManager):
         dimension = 'DBClusterIdentifier'
         date = None
 
-    retry = staticmethod(get_retry(('Throttled',)))
+    permissions = ('tag:GetResources', 'rds:ListTagsForResource')
+
+    def get_source(self, source_type):
+        if source_type == 'describe':
+            return DescribeCluster(self)
+        return super(RDSCluster, self).get_source(source_type)
 
     @property
     def generate_arn(self):
@@ -59,31 +65,99 @@ class RDSCluster(QueryResourceManager):
         return self._generate_arn
 
     def augment(self, dbs):
-        return list(filter(None, _rds_cluster_tags(
+        return _rds_cluster_tags(
             self.get_model(),
-            dbs, self.session_factory,
-            self.generate_arn, self.retry)))
+            dbs, self.session_factory, self.executor_factory,
+            self.generate_arn)
+
+
+class DescribeCluster(DescribeSource):
+
+    def get_resources(self, ids, cache=True):
+        # Look up clusters by id rather than describing all of them.
+        client = local_session(self.manager.session_factory).client('rds')
+        results = []
+        for id_set in chunks(ids, 100):
+            results.extend(self.manager.retry(
+                client.describe_db_clusters,
+                Filters=[{'Name': 'db-cluster-id', 'Values': id_set}],
+                MaxRecords=100)['DBClusters'])
+        return results
 
 
 RDSCluster.filter_registry.register('tag-count', tags.TagCountFilter)
 RDSCluster.filter_registry.register('marked-for-op', tags.TagActionFilter)
 
 
-def _rds_cluster_tags(model, dbs, session_factory, generator, retry):
+def _rds_cluster_tags(model, dbs, session_factory, executor_factory,
+                      generator):
     """Augment rds clusters with their respective tags."""
-    client = local_session(session_factory).client('rds')
+    if not dbs:
+        return dbs
+
+    # Fetch tags for all clusters in pages via the tagging api, clusters
+    # it hasn't indexed yet fall back to a per cluster lookup.
+    tagging = local_session(session_factory).client('resourcegroupstaggingapi')
+    paginator = tagging.get_paginator('get_resources')
+    paginator.PAGE_ITERATOR_CLS = RetryPageIterator
+    tag_index = {}
+    for page in paginator.paginate(
+            ResourceTypeFilters=['rds:cluster'], ResourcesPerPage=100):
+        for r in page['ResourceTagMappingList']:
+            tag_index[r['ResourceARN']] = r['Tags']
+
+    client = _rds_client(session_factory, 2)
+    not_found = client.exceptions.DBClusterNotFoundFault
 
     def process_tags(db):
         try:
-            db['Tags'] = retry(
-                client.list_tags_for_resource,
-                ResourceName=generator(db[model.id]))['TagList']
+            db['Tags'] = client.list_tags_for_resource(
+                ResourceName=_cluster_arn(db, generator))['TagList']
             return db
-        except client.exceptions.DBClusterNotFoundFault:
+        except not_found:
             return None
 
-    # Rds maintains a low api call limit, so this can take some time :-(
-    return list(filter(None, map(process_tags, dbs)))
+    results = []
+    missing = []
+    for db in dbs:
+        arn = _cluster_arn(db, generator)
+        if arn in tag_index:
+            db['Tags'] = tag_index[arn]
+            results.append(db)
+        else:
+            missing.append(db)
+
+    # Rds maintains a low api call limit, so keep the concurrency low.
+    if missing:
+        with executor_factory(max_workers=2) as w:
+            results.extend(
+                db for db in w.map(process_tags, missing) if db is not None)
+    return results
+
+
+def _rds_client(session_factory, max_workers=1):
+    # Size the connection pool so threads sharing the client don't
+    # queue on it, and let botocore retry throttled calls for longer
+    # given the low rds api limits.
+    return local_session(session_factory).client(
+        'rds', config=Config(
+            max_pool_connections=max(10, max_workers),
+            retries={'max_attempts': 10}))
+
+
+def _manager_client(manager):
+    # Actions share one client per manager across their workers rather
+    # than building a client per cluster. Its pool covers the most
+    # concurrent calls an action makes (cluster delete with instances).
+    client = getattr(manager, '_rds_client', None)
+    if client is None:
+        client = manager._rds_client = _rds_client(
+            manager.session_factory, 24)
+    return client
+
+
+def _cluster_arn(db, generator):
+    return db.get('DBClusterArn') or generator(db['DBClusterIdentifier'])
 
 
 @RDSCluster.action_registry.register('mark-for-op')
@@ -105,6 +179,10 @@ class TagDelayedAction(tags.TagDelayedAction):
                     days: 7
     """
 
+    def get_client(self):
+        return _rds_client(
+            self.manager.session_factory, self.concurrency * self.batch_size)
+
 
 @RDSCluster.action_registry.register('tag')
 @RDSCluster.action_registry.register('mark')
@@ -130,10 +208,19 @@ class Tag(tags.Tag):
     batch_size = 5
     permissions = ('rds:AddTagsToResource',)
 
+    def get_client(self):
+        return _rds_client(
+            self.manager.session_factory, self.concurrency * self.batch_size)
+
     def process_resource_set(self, client, dbs, ts):
-        for db in dbs:
-            arn = self.manager.generate_arn(db['DBClusterIdentifier'])
-            client.add_tags_to_resource(ResourceName=arn, Tags=ts)
+        generator = self.manager.generate_arn
+
+        def process_cluster(db):
+            client.add_tags_to_resource(
+                ResourceName=_cluster_arn(db, generator), Tags=ts)
+
+        with self.executor_factory(max_workers=len(dbs)) as w:
+            list(w.map(process_cluster, dbs))
 
 
 @RDSCluster.action_registry.register('remove-tag')
@@ -159,11 +246,19 @@ class RemoveTag(tags.RemoveTag):
     batch_size = 5
     permissions = ('rds:RemoveTagsFromResource',)
 
+    def get_client(self):
+        return _rds_client(
+            self.manager.session_factory, self.concurrency * self.batch_size)
+
     def process_resource_set(self, client, dbs, tag_keys):
-        for db in dbs:
+        generator = self.manager.generate_arn
+
+        def process_cluster(db):
             client.remove_tags_from_resource(
-                ResourceName=self.manager.generate_arn(db['DBClusterIdentifier']),
-                TagKeys=tag_keys)
+                ResourceName=_cluster_arn(db, generator), TagKeys=tag_keys)
+
+        with self.executor_factory(max_workers=len(dbs)) as w:
+            list(w.map(process_cluster, dbs))
 
 
 @RDSCluster.filter_registry.register('security-group')
@@ -182,17 +277,16 @@ class SubnetFilter(net_filters.SubnetFilter):
             'rds-subnet-group').get_permissions()
 
     def get_related_ids(self, resources):
-        group_ids = set()
+        subnet_ids = set()
         for r in resources:
-            group_ids.update(
-                [s['SubnetIdentifier'] for s in
-                 self.groups[r['DBSubnetGroup']]['Subnets']])
-        return group_ids
+            subnet_ids.update(self.group_subnets[r['DBSubnetGroup']])
+        return subnet_ids
 
     def process(self, resources, event=None):
-        self.groups = {
-            r['DBSubnetGroupName']: r for r in
-            self.manager.get_resource_manager('rds-subnet-group').resources()}
+        self.group_subnets = {
+            r['DBSubnetGroupName']: [s['SubnetIdentifier'] for s in r['Subnets']]
+            for r in self.manager.get_resource_manager(
+                'rds-subnet-group').resources()}
         return super(SubnetFilter, self).process(resources, event)
 
 
@@ -232,31 +326,37 @@ class Delete(BaseAction):
     permissions = ('rds:DeleteDBCluster',)
 
     def process(self, clusters):
+        client = _manager_client(self.manager)
+        errors = _cluster_errors(client)
+        with self.executor_factory(max_workers=3) as w:
+            list(w.map(
+                functools.partial(self.process_cluster, client, errors), clusters))
+
+    def delete_instance(self, client, instance):
+        client.delete_db_instance(
+            DBInstanceIdentifier=instance['DBInstanceIdentifier'],
+            SkipFinalSnapshot=True)
+        self.log.info(
+            'Deleted RDS instance: %s', instance['DBInstanceIdentifier'])
+
+    def process_cluster(self, client, errors, cluster):
         skip = self.data.get('skip-snapshot', False)
         delete_instances = self.data.get('delete-instances', True)
-        client = local_session(self.manager.session_factory).client('rds')
 
-        for cluster in clusters:
-            if delete_instances:
-                for instance in cluster.get('DBClusterMembers', []):
-                    client.delete_db_instance(
-                        DBInstanceIdentifier=instance['DBInstanceIdentifier'],
-                        SkipFinalSnapshot=True)
-                    self.log.info(
-                        'Deleted RDS instance: %s',
-                        instance['DBInstanceIdentifier'])
-
-            params = {'DBClusterIdentifier': cluster['DBClusterIdentifier']}
-            if skip:
-                params['SkipFinalSnapshot'] = True
-            else:
-                params['FinalDBSnapshotIdentifier'] = snapshot_identifier(
-                    'Final', cluster['DBClusterIdentifier'])
-
-            _run_cluster_method(
-                client.delete_db_cluster, params,
-                (client.exceptions.DBClusterNotFoundFault, client.exceptions.ResourceNotFoundFault),
-                client.exceptions.InvalidDBClusterStateFault)
+        members = cluster.get('DBClusterMembers', [])
+        if delete_instances and members:
+            with self.executor_factory(max_workers=min(len(members), 8)) as w:
+                list(w.map(
+                    functools.partial(self.delete_instance, client), members))
+
+        params = {'DBClusterIdentifier': cluster['DBClusterIdentifier']}
+        if skip:
+            params['SkipFinalSnapshot'] = True
+        else:
+            params['FinalDBSnapshotIdentifier'] = snapshot_identifier(
+                'Final', cluster['DBClusterIdentifier'])
+
+        _run_cluster_method(client.delete_db_cluster, params, *errors)
 
 
 @RDSCluster.action_registry.register('retention')
@@ -293,34 +393,45 @@ class RetentionWindow(BaseAction):
     permissions = ('rds:ModifyDBCluster',)
 
     def process(self, clusters):
-        client = local_session(self.manager.session_factory).client('rds')
-
-        for cluster in clusters:
-            self.process_snapshot_retention(client, cluster)
+        error = None
+        client = _manager_client(self.manager)
+        errors = _cluster_errors(client)
+        with self.executor_factory(max_workers=3) as w:
+            futures = []
+            for cluster in clusters:
+                futures.append(w.submit(
+                    self.process_snapshot_retention, client, errors, cluster))
+            for f in as_completed(futures):
+                if f.exception():
+                    error = f.exception()
+                    self.log.error(
+                        "Exception setting rds cluster retention \n %s",
+                        f.exception())
+        if error:
+            raise error
 
-    def process_snapshot_retention(self, client, cluster):
+    def process_snapshot_retention(self, client, errors, cluster):
         current_retention = int(cluster.get('BackupRetentionPeriod', 0))
         new_retention = self.data['days']
         retention_type = self.data.get('enforce', 'min').lower()
 
         if retention_type == 'min':
             self.set_retention_window(
-                client, cluster, max(current_retention, new_retention))
+                client, errors, cluster, max(current_retention, new_retention))
         elif retention_type == 'max':
             self.set_retention_window(
-                client, cluster, min(current_retention, new_retention))
+                client, errors, cluster, min(current_retention, new_retention))
         elif retention_type == 'exact':
-            self.set_retention_window(client, cluster, new_retention)
+            self.set_retention_window(client, errors, cluster, new_retention)
 
-    def set_retention_window(self, client, cluster, retention):
+    def set_retention_window(self, client, errors, cluster, retention):
         _run_cluster_method(
             client.modify_db_cluster,
             dict(DBClusterIdentifier=cluster['DBClusterIdentifier'],
                  BackupRetentionPeriod=retention,
                  PreferredBackupWindow=cluster['PreferredBackupWindow'],
                  PreferredMaintenanceWindow=cluster['PreferredMaintenanceWindow']),
-            (client.exceptions.DBClusterNotFoundFault, client.exceptions.ResourceNotFoundFault),
-            client.exceptions.InvalidDBClusterStateFault)
+            *errors)
 
 
 @RDSCluster.action_registry.register('stop')
@@ -332,12 +443,16 @@ class Stop(BaseAction):
     permissions = ('rds:StopDBCluster',)
 
     def process(self, clusters):
-        client = local_session(self.manager.session_factory).client('rds')
-        for c in clusters:
-            _run_cluster_method(
-                client.stop_db_cluster, dict(DBClusterIdentifier=c['DBClusterIdentifier']),
-                (client.exceptions.DBClusterNotFoundFault, client.exceptions.ResourceNotFoundFault),
-                client.exceptions.InvalidDBClusterStateFault)
+        client = _manager_client(self.manager)
+        errors = _cluster_errors(client)
+        with self.executor_factory(max_workers=3) as w:
+            list(w.map(
+                functools.partial(self.process_cluster, client, errors), clusters))
+
+    def process_cluster(self, client, errors, c):
+        _run_cluster_method(
+            client.stop_db_cluster, dict(DBClusterIdentifier=c['DBClusterIdentifier']),
+            *errors)
 
 
 @RDSCluster.action_registry.register('start')
@@ -349,12 +464,23 @@ class Start(BaseAction):
     permissions = ('rds:StartDBCluster',)
 
     def process(self, clusters):
-        client = local_session(self.manager.session_factory).client('rds')
-        for c in clusters:
-            _run_cluster_method(
-                client.start_db_cluster, dict(DBClusterIdentifier=c['DBClusterIdentifier']),
-                (client.exceptions.DBClusterNotFoundFault, client.exceptions.ResourceNotFoundFault),
-                client.exceptions.InvalidDBClusterStateFault)
+        client = _manager_client(self.manager)
+        errors = _cluster_errors(client)
+        with self.executor_factory(max_workers=3) as w:
+            list(w.map(
+                functools.partial(self.process_cluster, client, errors), clusters))
+
+    def process_cluster(self, client, errors, c):
+        _run_cluster_method(
+            client.start_db_cluster, dict(DBClusterIdentifier=c['DBClusterIdentifier']),
+            *errors)
+
+
+def _cluster_errors(client):
+    """Errors to ignore and to warn on when calling a cluster method."""
+    return ((client.exceptions.DBClusterNotFoundFault,
+             client.exceptions.ResourceNotFoundFault),
+            client.exceptions.InvalidDBClusterStateFault)
 
 
 def _run_cluster_method(method, params, ignore=(), warn=(), method_name=""):
@@ -387,16 +513,20 @@ class Snapshot(BaseAction):
     permissions = ('rds:CreateDBClusterSnapshot',)
 
     def process(self, clusters):
-        client = local_session(self.manager.session_factory).client('rds')
-        for cluster in clusters:
-            _run_cluster_method(
-                client.create_db_cluster_snapshot,
-                dict(
-                    DBClusterSnapshotIdentifier=snapshot_identifier(
-                        'Backup', cluster['DBClusterIdentifier']),
-                    DBClusterIdentifier=cluster['DBClusterIdentifier']),
-                (client.exceptions.DBClusterNotFoundFault, client.exceptions.ResourceNotFoundFault),
-                client.exceptions.InvalidDBClusterStateFault)
+        client = _manager_client(self.manager)
+        errors = _cluster_errors(client)
+        with self.executor_factory(max_workers=3) as w:
+            list(w.map(
+                functools.partial(self.process_cluster, client, errors), clusters))
+
+    def process_cluster(self, client, errors, cluster):
+        _run_cluster_method(
+            client.create_db_cluster_snapshot,
+            dict(
+                DBClusterSnapshotIdentifier=snapshot_identifier(
+                    'Backup', cluster['DBClusterIdentifier']),
+                DBClusterIdentifier=cluster['DBClusterIdentifier']),
+            *errors)
 
 
 @resources.register('rds-cluster-snapshot')
@@ -468,28 +598,52 @@ class RDSClusterSnapshotDelete(BaseAction):
 
     def process(self, snapshots):
         log.info("Deleting %d RDS cluster snapshots", len(snapshots))
-        client = local_session(self.manager.session_factory).client('rds')
+        client = _manager_client(self.manager)
         error = None
-        with self.executor_factory(max_workers=2) as w:
-            futures = []
-            for snapshot_set in chunks(reversed(snapshots), size=50):
-                futures.append(
+        max_workers = 2
+        # Snapshots of the same cluster are deleted serially on one
+        # worker, spreading concurrent calls across clusters, and those
+        # already being deleted are skipped.
+        cluster_snapshots = OrderedDict()
+        for s in reversed(snapshots):
+            if s.get('Status') == 'deleting':
+                continue
+            cluster_snapshots.setdefault(
+                s.get('DBClusterIdentifier'), []).append(s)
+
+        with self.executor_factory(max_workers=max_workers) as w:
+            # Bound the number of queued snapshot sets, so a large delete
+            # doesn't get submitted to the executor all at once.
+            futures = set()
+            for snapshot_set in cluster_snapshots.values():
+                if len(futures) >= max_workers * 2:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    error = self.check_futures(done) or error
+                futures.add(
                     w.submit(self.process_snapshot_set, client, snapshot_set))
-            for f in as_completed(futures):
-                if f.exception():
-                    error = f.exception()
-                    self.log.error(
-                        "Exception deleting snapshot set \n %s",
-                        f.exception())
+            error = self.check_futures(as_completed(futures)) or error
         if error:
             raise error
         return snapshots
 
+    def check_futures(self, futures):
+        error = None
+        for f in futures:
+            if f.exception():
+                error = f.exception()
+                self.log.error(
+                    "Exception deleting snapshot set \n %s",
+                    f.exception())
+        return error
+
     def process_snapshot_set(self, client, snapshots_set):
+        ignore = (client.exceptions.DBClusterSnapshotNotFoundFault,
+                  client.exceptions.InvalidDBClusterSnapshotStateFault,
+                  client.exceptions.DBSnapshotNotFoundFault,
+                  client.exceptions.InvalidDBSnapshotStateFault)
         for s in snapshots_set:
             try:
                 client.delete_db_cluster_snapshot(
                     DBClusterSnapshotIdentifier=s['DBClusterSnapshotIdentifier'])
-            except (client.exceptions.DBSnapshotNotFoundFault,
-                    client.exceptions.InvalidDBSnapshotStateFault):
+            except ignore:
                 continue
@@ -27,34 +27,113 @@ the utils.type_schema function.
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-from collections import Counter
 import json
 import logging
+import os
+from operator import itemgetter
 
-from jsonschema import Draft4Validator as Validator
-from jsonschema.exceptions import best_match
+import six
+
+from jsonschema import Draft4Validator
+from jsonschema.exceptions import ValidationError, best_match
+from jsonschema.validators import extend
+
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover
+    fastjsonschema = None
 
 from c7n.policy import execution
 from c7n.provider import clouds
 from c7n.resources import load_resources
+from c7n.utils import orjson
 from c7n.filters import ValueFilter, EventFilter, AgeFilter
 
+log = logging.getLogger('custodian.schema')
+
+
+def _policy_any_of(validator, any_of, instance, schema):
+    """anyOf which checks a policy against its resource type's schema only.
+
+    Policies are validated against an anyOf of every resource type's
+    policy schema, each of which only accepts its own resource type,
+    so the other branches can be skipped. Any other anyOf, or a policy
+    with an unknown resource type, is handled by the default validator.
+    """
+    index = None
+    resource = isinstance(instance, dict) and instance.get('resource')
+    if isinstance(resource, six.string_types):
+        index = _resource_index(any_of).get(resource)
+    if index is None:
+        for e in _any_of(validator, any_of, instance, schema):
+            yield e
+        return
+    errors = list(validator.descend(instance, any_of[index], schema_path=index))
+    if errors:
+        yield ValidationError(
+            "%r is not valid under any of the given schemas" % (instance,),
+            context=errors)
+
+
+_any_of = Draft4Validator.VALIDATORS['anyOf']
+
+# Index of resource type to branch, by anyOf list id, holding on to
+# the list so its id isn't reused.
+_resource_indexes = {}
+
+
+def _resource_index(any_of):
+    entry = _resource_indexes.get(id(any_of))
+    if entry is None or entry[0] is not any_of:
+        index = {}
+        for idx, v in enumerate(any_of):
+            ref = isinstance(v, dict) and v.get('$ref') or ''
+            if not (ref.startswith('#/definitions/resources/') and
+                    ref.endswith('/policy')):
+                index = {}
+                break
+            resource_type = _split_ref(ref)[1]
+            index[resource_type] = idx
+            # aws resources may be referenced without the provider prefix
+            if resource_type.startswith('aws.'):
+                index[resource_type[4:]] = idx
+        if len(_resource_indexes) > 64:
+            _resource_indexes.clear()
+        entry = _resource_indexes[id(any_of)] = (any_of, index)
+    return entry[1]
+
+
+Validator = extend(Draft4Validator, {'anyOf': _policy_any_of})
+
 
 def validate(data, schema=None):
     if schema is None:
-        schema = generate()
-        Validator.check_schema(schema)
+        schema = _cached_schema(_used_resources(data))
 
     validator = Validator(schema)
 
-    errors = list(validator.iter_errors(data))
+    # Use a compiled validator, when available, for the common case
+    # of valid data and only walk the schema with jsonschema to report
+    # errors.
+    fast_validate = _fast_validator(schema)
+    if fast_validate is not None:
+        try:
+            fast_validate(data)
+            errors = []
+        except fastjsonschema.JsonSchemaException:
+            errors = list(validator.iter_errors(data))
+    else:
+        errors = list(validator.iter_errors(data))
 
     if not errors:
-        counter = Counter([p['name'] for p in data.get('policies')])
+        seen = set()
         dupes = []
-        for k, v in counter.items():
-            if v > 1:
-                dupes.append(k)
+        for p in data.get('policies'):
+            name = p['name']
+            if name not in seen:
+                seen.add(name)
+            elif name not in dupes:
+                dupes.append(name)
         if dupes:
             return [ValueError(
                 "Only one policy with a given name allowed, duplicates: %s" % (
@@ -62,11 +141,9 @@ def validate(data, schema=None):
         return []
     try:
         resp = specific_error(errors[0])
-        name = isinstance(
-            errors[0].instance,
-            dict) and errors[0].instance.get(
-            'name',
-            'unknown') or 'unknown'
+        instance = errors[0].instance
+        name = instance.get(
+            'name', 'unknown') if isinstance(instance, dict) else 'unknown'
         return [resp, name]
     except Exception:
         logging.exception(
@@ -74,10 +151,121 @@ def validate(data, schema=None):
 
     return list(filter(None, [
         errors[0],
-        best_match(validator.iter_errors(data)),
+        best_match(errors),
     ]))
 
 
+# Generated and checked schemas, by resource types and registry state.
+_schemas = {}
+
+
+def _registry_key():
+    return tuple(
+        (rname, len(rtype.action_registry.keys()),
+         len(rtype.filter_registry.keys()))
+        for cname, ctype in clouds.items()
+        for rname, rtype in ctype.resources.items())
+
+
+def _used_resources(data):
+    """Resource types used by policies in data.
+
+    Returns an empty set, ie. all resources, if any policy's resource
+    type isn't known, so it gets reported against the full schema.
+    """
+    policies = isinstance(data, dict) and data.get('policies') or ()
+    if not isinstance(policies, list):
+        return set()
+    known = set()
+    for cname, ctype in clouds.items():
+        known.update(ctype.resources.keys())
+    used = set()
+    for p in policies:
+        r = isinstance(p, dict) and p.get('resource') or None
+        if not isinstance(r, six.string_types):
+            return set()
+        r = r.split('.', 1)[-1]
+        if r not in known:
+            return set()
+        used.add(r)
+    return used
+
+
+def _cached_schema(resource_types=()):
+    """Generate a schema once for a given set of registered resources.
+
+    Registering resources, actions or filters changes the key, so
+    a new schema is generated.
+    """
+    key = (frozenset(resource_types), _registry_key())
+    schema = _schemas.get(key)
+    if schema is None:
+        schema = generate(resource_types)
+        Validator.check_schema(schema)
+        if len(_schemas) > 8:
+            _schemas.clear()
+            _fast_validators.clear()
+            _resource_indexes.clear()
+        _schemas[key] = schema
+    return schema
+
+
+# Compiled validators by schema id, holding on to the schema so
+# its id isn't reused.
+_fast_validators = {}
+
+
+def _fast_validator(schema):
+    """Compile a schema with fastjsonschema if installed and enabled.
+
+    Set C7N_FAST_VALIDATE=no to always use jsonschema.
+    """
+    if fastjsonschema is None or os.environ.get(
+            'C7N_FAST_VALIDATE', 'yes').lower() in ('no', 'false', '0'):
+        return None
+    entry = _fast_validators.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        try:
+            fast_schema = _fast_schema(schema)
+            # Our schema is validated as draft 4, fastjsonschema would
+            # otherwise treat the generic $schema uri as its latest draft.
+            fast_schema['$schema'] = 'http://json-schema.org/draft-04/schema#'
+            compiled = fastjsonschema.compile(fast_schema)
+        except Exception as e:
+            log.warning("unable to compile schema, using jsonschema: %s", e)
+            compiled = None
+        if len(_fast_validators) > 8:
+            _fast_validators.clear()
+        entry = _fast_validators[id(schema)] = (schema, compiled)
+    return entry[1]
+
+
+def _fast_schema(schema):
+    """Copy of schema in the form fastjsonschema expects.
+
+    Tuples become lists, and non list 'required' values, which
+    jsonschema ignores for the array properties they're used on,
+    are dropped.
+    """
+    if isinstance(schema, dict):
+        return {k: _fast_schema(v) for k, v in schema.items()
+                if k != 'required' or isinstance(v, (list, tuple))}
+    elif isinstance(schema, (list, tuple)):
+        return [_fast_schema(v) for v in schema]
+    return schema
+
+
+# Split $ref paths, the same refs are looked up for every error.
+_split_refs = {}
+
+
+def _split_ref(ref):
+    parts = _split_refs.get(ref)
+    if parts is None:
+        parts = _split_refs[ref] = ref.rsplit('/', 2)
+    return parts
+
+
 def specific_error(error):
     """Try to find the best error for humans to resolve
 
@@ -87,84 +275,140 @@ def specific_error(error):
     instead we can use a bit of structural knowledge of schema to
     provide better results.
     """
-    if error.validator not in ('anyOf', 'oneOf'):
+    # Walk down nested anyOf/oneOf errors, bounded by schema depth.
+    for _ in range(16):
+        if error.validator not in ('anyOf', 'oneOf'):
+            return error
+
+        r = t = None
+
+        if isinstance(error.instance, dict):
+            t = error.instance.get('type')
+            r = error.instance.get('resource')
+
+        if r is not None:
+            found = None
+            for idx, v in enumerate(error.validator_value):
+                if _split_ref(v['$ref'])[1].endswith(r):
+                    found = idx
+                    break
+            if found is not None:
+                # error context is a flat list of all validation
+                # failures, we have to index back to the policy
+                # of interest.
+                nested = None
+                for e in error.context:
+                    # resource policies have a fixed path from
+                    # the top of the schema
+                    if e.absolute_schema_path[4] == found:
+                        nested = e
+                        break
+                if nested is None and found < len(error.context):
+                    nested = error.context[found]
+                if nested is not None:
+                    error = nested
+                    continue
+
+        if t is not None:
+            found = None
+            for idx, v in enumerate(error.validator_value):
+                if '$ref' in v and _split_ref(v['$ref'])[-1] == t:
+                    found = idx
+                    break
+                elif 'type' in v and t in v['properties']['type']['enum']:
+                    found = idx
+                    break
+
+            if found is not None:
+                for e in error.context:
+                    for el in reversed(e.absolute_schema_path):
+                        if isinstance(el, int):
+                            if el == found:
+                                return e
+                            break
         return error
+    return error
 
-    r = t = None
-
-    if isinstance(error.instance, dict):
-        t = error.instance.get('type')
-        r = error.instance.get('resource')
 
-    if r is not None:
-        found = None
-        for idx, v in enumerate(error.validator_value):
-            if v['$ref'].rsplit('/', 2)[1].endswith(r):
-                found = idx
-                break
-        if found is not None:
-            # error context is a flat list of all validation
-            # failures, we have to index back to the policy
-            # of interest.
-            for e in error.context:
-                # resource policies have a fixed path from
-                # the top of the schema
-                if e.absolute_schema_path[4] == found:
-                    return specific_error(e)
-            return specific_error(error.context[idx])
-
-    if t is not None:
-        found = None
-        for idx, v in enumerate(error.validator_value):
-            if '$ref' in v and v['$ref'].rsplit('/', 2)[-1] == t:
-                found = idx
-                break
-            elif 'type' in v and t in v['properties']['type']['enum']:
-                found = idx
-                break
+# Static parts of the schema, shared by every generated schema.
+_IAM_STATEMENT_SCHEMA = {
+    'additionalProperties': False,
+    'type': 'object',
+    'properties': {
+        'Sid': {'type': 'string'},
+        'Effect': {'type': 'string', 'enum': ['Allow', 'Deny']},
+        'Principal': {'anyOf': [
+            {'type': 'string'},
+            {'type': 'object'}, {'type': 'array'}]},
+        'NotPrincipal': {'anyOf': [{'type': 'object'}, {'type': 'array'}]},
+        'Action': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
+        'NotAction': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
+        'Resource': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
+        'NotResource': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
+        'Condition': {'type': 'object'}
+    },
+    'required': ['Sid', 'Effect'],
+    'allOf': [
+        {'oneOf': [
+            {'required': ['Principal']},
+            {'required': ['NotPrincipal']}]},
+        {'oneOf': [
+            {'required': ['Action']},
+            {'required': ['NotAction']}]},
+        {'oneOf': [
+            {'required': ['Resource']},
+            {'required': ['NotResource']}]}
+    ]
+}
+
+
+_POLICY_SCHEMA = {
+    'type': 'object',
+    'required': ['name', 'resource'],
+    'additionalProperties': False,
+    'properties': {
+        'name': {
+            'type': 'string',
+            'pattern': "^[A-Za-z_][A-Za-z0-9_]*(?:-[A-Za-z0-9_]+)*$"},
+        'region': {'type': 'string'},
+        'tz': {'type': 'string'},
+        'start': {'format': 'date-time'},
+        'end': {'format': 'date-time'},
+        'resource': {'type': 'string'},
+        'max-resources': {'type': 'integer', 'minimum': 1},
+        'max-resources-percent': {'type': 'number', 'minimum': 0, 'maximum': 100},
+        'comment': {'type': 'string'},
+        'comments': {'type': 'string'},
+        'description': {'type': 'string'},
+        'tags': {'type': 'array', 'items': {'type': 'string'}},
+        'mode': {'$ref': '#/definitions/policy-mode'},
+        'source': {'enum': ['describe', 'config']},
+        'actions': {
+            'type': 'array',
+        },
+        'filters': {
+            'type': 'array'
+        },
+        #
+        # unclear if this should be allowed, it kills resource
+        # cache coherency between policies, and we need to
+        # generalize server side query mechanisms, currently
+        # this only for ec2 instance queries. limitations
+        # in json schema inheritance prevent us from doing this
+        # on a type specific basis
+        # https://stackoverflow.com/questions/22689900/json-schema-allof-with-additionalproperties
+        'query': {
+            'type': 'array', 'items': {'type': 'object'}}
 
-        if found is not None:
-            for e in error.context:
-                for el in reversed(e.absolute_schema_path):
-                    if isinstance(el, int):
-                        if el == found:
-                            return e
-                        break
-    return error
+    },
+}
 
 
 def generate(resource_types=()):
     resource_defs = {}
     definitions = {
         'resources': resource_defs,
-        'iam-statement': {
-            'additionalProperties': False,
-            'type': 'object',
-            'properties': {
-                'Sid': {'type': 'string'},
-                'Effect': {'type': 'string', 'enum': ['Allow', 'Deny']},
-                'Principal': {'anyOf': [
-                    {'type': 'string'},
-                    {'type': 'object'}, {'type': 'array'}]},
-                'NotPrincipal': {'anyOf': [{'type': 'object'}, {'type': 'array'}]},
-                'Action': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
-                'NotAction': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
-                'Resource': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
-                'NotResource': {'anyOf': [{'type': 'string'}, {'type': 'array'}]},
-                'Condition': {'type': 'object'}
-            },
-            'required': ['Sid', 'Effect'],
-            'oneOf': [
-                {'required': ['Principal', 'Action', 'Resource']},
-                {'required': ['NotPrincipal', 'Action', 'Resource']},
-                {'required': ['Principal', 'NotAction', 'Resource']},
-                {'required': ['NotPrincipal', 'NotAction', 'Resource']},
-                {'required': ['Principal', 'Action', 'NotResource']},
-                {'required': ['NotPrincipal', 'Action', 'NotResource']},
-                {'required': ['Principal', 'NotAction', 'NotResource']},
-                {'required': ['NotPrincipal', 'NotAction', 'NotResource']}
-            ]
-        },
+        'iam-statement': _IAM_STATEMENT_SCHEMA,
         'actions': {},
         'filters': {
             'value': ValueFilter.schema,
@@ -177,46 +421,7 @@ def generate(resource_types=()):
                 'maxProperties': 1},
         },
 
-        'policy': {
-            'type': 'object',
-            'required': ['name', 'resource'],
-            'additionalProperties': False,
-            'properties': {
-                'name': {
-                    'type': 'string',
-                    'pattern': "^[A-z][A-z0-9]*(-[A-z0-9]+)*$"},
-                'region': {'type': 'string'},
-                'tz': {'type': 'string'},
-                'start': {'format': 'date-time'},
-                'end': {'format': 'date-time'},
-                'resource': {'type': 'string'},
-                'max-resources': {'type': 'integer', 'minimum': 1},
-                'max-resources-percent': {'type': 'number', 'minimum': 0, 'maximum': 100},
-                'comment': {'type': 'string'},
-                'comments': {'type': 'string'},
-                'description': {'type': 'string'},
-                'tags': {'type': 'array', 'items': {'type': 'string'}},
-                'mode': {'$ref': '#/definitions/policy-mode'},
-                'source': {'enum': ['describe', 'config']},
-                'actions': {
-                    'type': 'array',
-                },
-                'filters': {
-                    'type': 'array'
-                },
-                #
-                # unclear if this should be allowed, it kills resource
-                # cache coherency between policies, and we need to
-                # generalize server side query mechanisms, currently
-                # this only for ec2 instance queries. limitations
-                # in json schema inheritance prevent us from doing this
-                # on a type specific basis
-                # https://stackoverflow.com/questions/22689900/json-schema-allof-with-additionalproperties
-                'query': {
-                    'type': 'array', 'items': {'type': 'object'}}
-
-            },
-        },
+        'policy': _POLICY_SCHEMA,
         'policy-mode': {
             'anyOf': [e.schema for _, e in execution.items()],
         }
@@ -260,8 +465,19 @@ def generate(resource_types=()):
     return schema
 
 
+# Canonical copies of $ref paths, so the same path string is shared
+# by every schema generated in the process.
+_ref_paths = {}
+
+
+def _ref(path):
+    return {'$ref': _ref_paths.setdefault(path, path)}
+
+
 def process_resource(type_name, resource_type, resource_defs, alias_name=None, definitions=None):
     r = resource_defs.setdefault(type_name, {'actions': {}, 'filters': {}})
+    r_actions, r_filters = r['actions'], r['filters']
+    act_defs, filt_defs = definitions['actions'], definitions['filters']
 
     seen_actions = set()  # Aliases get processed once
     action_refs = []
@@ -270,37 +486,25 @@ def process_resource(type_name, resource_type, resource_defs, alias_name=None, d
             continue
         else:
             seen_actions.add(a)
+        a_schema = a.schema
         if a.schema_alias:
-            if action_name in definitions['actions']:
-                assert definitions['actions'][action_name] == a.schema, "Schema mismatch on action w/ schema alias"  # NOQA
-            definitions['actions'][action_name] = a.schema
-            action_refs.append({'$ref': '#/definitions/actions/%s' % action_name})
+            if action_name in act_defs:
+                assert act_defs[action_name] == a_schema, "Schema mismatch on action w/ schema alias"  # NOQA
+            act_defs[action_name] = a_schema
+            action_refs.append(_ref('#/definitions/actions/%s' % action_name))
         else:
-            r['actions'][action_name] = a.schema
-            action_refs.append(
-                {'$ref': '#/definitions/resources/%s/actions/%s' % (
-                    type_name, action_name)})
+            r_actions[action_name] = a_schema
+            action_refs.append(_ref('#/definitions/resources/%s/actions/%s' % (
+                type_name, action_name)))
 
     # one word action shortcuts
     action_refs.append(
         {'enum': list(resource_type.action_registry.keys())})
 
-    nested_filter_refs = []
-    filters_seen = set()
-    for k, v in sorted(resource_type.filter_registry.items()):
-        if v in filters_seen:
-            continue
-        else:
-            filters_seen.add(v)
-        nested_filter_refs.append(
-            {'$ref': '#/definitions/resources/%s/filters/%s' % (
-                type_name, k)})
-    nested_filter_refs.append(
-        {'$ref': '#/definitions/filters/valuekv'})
-
     filter_refs = []
     filters_seen = set()  # for aliases
-    for filter_name, f in sorted(resource_type.filter_registry.items()):
+    for filter_name, f in sorted(
+            resource_type.filter_registry.items(), key=itemgetter(0)):
         if f in filters_seen:
             continue
         else:
@@ -308,28 +512,23 @@ def process_resource(type_name, resource_type, resource_defs, alias_name=None, d
 
         if filter_name in ('or', 'and', 'not'):
             continue
+        f_schema = f.schema
         if f.schema_alias:
-            if filter_name in definitions['filters']:
-                assert definitions['filters'][filter_name] == f.schema, "Schema mismatch on filter w/ schema alias" # NOQA
-            definitions['filters'][filter_name] = f.schema
-            filter_refs.append({
-                '$ref': '#/definitions/filters/%s' % filter_name})
+            if filter_name in filt_defs:
+                assert filt_defs[filter_name] == f_schema, "Schema mismatch on filter w/ schema alias" # NOQA
+            filt_defs[filter_name] = f_schema
+            filter_refs.append(_ref('#/definitions/filters/%s' % filter_name))
             continue
         elif filter_name == 'value':
-            r['filters'][filter_name] = {
-                '$ref': '#/definitions/filters/value'}
-            r['filters']['valuekv'] = {
-                '$ref': '#/definitions/filters/valuekv'}
+            r_filters[filter_name] = _ref('#/definitions/filters/value')
+            r_filters['valuekv'] = _ref('#/definitions/filters/valuekv')
         elif filter_name == 'event':
-            r['filters'][filter_name] = {
-                '$ref': '#/definitions/filters/event'}
+            r_filters[filter_name] = _ref('#/definitions/filters/event')
         else:
-            r['filters'][filter_name] = f.schema
-        filter_refs.append(
-            {'$ref': '#/definitions/resources/%s/filters/%s' % (
-                type_name, filter_name)})
-    filter_refs.append(
-        {'$ref': '#/definitions/filters/valuekv'})
+            r_filters[filter_name] = f_schema
+        filter_refs.append(_ref('#/definitions/resources/%s/filters/%s' % (
+            type_name, filter_name)))
+    filter_refs.append(_ref('#/definitions/filters/valuekv'))
 
     # one word filter shortcuts
     filter_refs.append(
@@ -337,7 +536,7 @@ def process_resource(type_name, resource_type, resource_defs, alias_name=None, d
 
     resource_policy = {
         'allOf': [
-            {'$ref': '#/definitions/policy'},
+            _ref('#/definitions/policy'),
             {'properties': {
                 'resource': {'enum': [type_name]},
                 'filters': {
@@ -357,7 +556,7 @@ def process_resource(type_name, resource_type, resource_defs, alias_name=None, d
         resource_policy['allOf'][1]['properties']['query'] = {}
 
     r['policy'] = resource_policy
-    return {'$ref': '#/definitions/resources/%s/policy' % type_name}
+    return _ref('#/definitions/resources/%s/policy' % type_name)
 
 
 def resource_vocabulary(cloud_name=None, qualify_name=True):
@@ -413,7 +612,11 @@ def summary(vocabulary):
 
 def json_dump(resource=None):
     load_resources()
-    print(json.dumps(generate(resource), indent=2))
+    schema = generate(resource)
+    if orjson is not None:
+        print(orjson.dumps(schema, option=orjson.OPT_INDENT_2).decode('utf8'))
+    else:
+        print(json.dumps(schema, indent=2))
 
 
 if __name__ == '__main__':
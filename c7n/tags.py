@@ -22,17 +22,19 @@ snapshots).
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 from collections import Counter
-from concurrent.futures import as_completed
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
 
 from datetime import datetime, timedelta
 from dateutil import tz as tzutil
 from dateutil.parser import parse
 
-import itertools
+import heapq
 import jmespath
+import random
 import time
 
 from c7n.manager import resources as aws_resources
+from c7n.resources import load_resources
 from c7n.actions import BaseAction as Action, AutoTagUser
 from c7n.exceptions import PolicyValidationError, PolicyExecutionError
 from c7n.filters import Filter, OPERATORS
@@ -48,7 +50,7 @@ def register_ec2_tags(filters, actions):
 
     actions.register('auto-tag-user', AutoTagUser)
     actions.register('mark-for-op', TagDelayedAction)
-    actions.register('tag-trim', TagTrim)
+    actions.register('tag-trim', EC2TagTrim)
 
     actions.register('mark', Tag)
     actions.register('tag', Tag)
@@ -93,10 +95,6 @@ def universal_augment(self, resources):
     client = utils.local_session(
         self.session_factory).client('resourcegroupstaggingapi', region_name=region)
 
-    # Lazy for non circular :-(
-    from c7n.query import RetryPageIterator
-    paginator = client.get_paginator('get_resources')
-    paginator.PAGE_ITERATOR_CLS = RetryPageIterator
     resource_type = getattr(self.get_model(), 'resource_type', None)
 
     if not resource_type:
@@ -104,11 +102,7 @@ def universal_augment(self, resources):
         if self.get_model().type:
             resource_type += ":" + self.get_model().type
 
-    resource_tag_map_list = list(itertools.chain(
-        *[p['ResourceTagMappingList'] for p in paginator.paginate(
-            ResourceTypeFilters=[resource_type])]))
-    resource_tag_map = {
-        r['ResourceARN']: r['Tags'] for r in resource_tag_map_list}
+    resource_tag_map = universal_tag_map(client, [resource_type])
 
     for arn, r in zip(self.get_arns(resources), resources):
         if arn in resource_tag_map:
@@ -116,27 +110,77 @@ def universal_augment(self, resources):
     return resources
 
 
+def universal_tag_map(client, resource_types):
+    """Fetch tags for all resources of the given types from the tagging api.
+
+    Returns a mapping of {arn: tags}. Resource types are passed to the
+    api together, up to its limit of 100 per call, so multiple types
+    share a single paginated pass.
+    """
+    # Lazy for non circular :-(
+    from c7n.query import RetryPageIterator
+    paginator = client.get_paginator('get_resources')
+    paginator.PAGE_ITERATOR_CLS = RetryPageIterator
+
+    resource_tag_map = {}
+    for type_set in utils.chunks(resource_types, size=100):
+        for p in paginator.paginate(ResourceTypeFilters=type_set):
+            for r in p['ResourceTagMappingList']:
+                resource_tag_map[r['ResourceARN']] = r['Tags']
+    return resource_tag_map
+
+
 def _common_tag_processer(executor_factory, batch_size, concurrency, client,
                           process_resource_set, id_key, resources, tags,
                           log):
 
-    error = None
-    with executor_factory(max_workers=concurrency) as w:
-        futures = []
-        for resource_set in utils.chunks(resources, size=batch_size):
-            futures.append(
-                w.submit(process_resource_set, client, resource_set, tags))
-
-        for f in as_completed(futures):
+    def check_futures(done):
+        error = None
+        for f in done:
+            resource_set = futures.pop(f)
             if f.exception():
                 error = f.exception()
                 log.error(
-                    "Exception with tags: %s  %s", tags, f.exception())
+                    "Exception with tags: %s on %d resources %s",
+                    tags, len(resource_set), f.exception())
+        return error
+
+    # Don't start more workers than there are batches.
+    concurrency = max(1, min(
+        concurrency, (len(resources) + batch_size - 1) // batch_size))
+
+    error = None
+    with executor_factory(max_workers=concurrency) as w:
+        # Bound the number of queued batches, submitting more as
+        # earlier ones complete.
+        futures = {}
+        for resource_set in utils.chunks(resources, size=batch_size):
+            if len(futures) >= concurrency * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                error = check_futures(done) or error
+            futures[w.submit(
+                process_resource_set, client, resource_set, tags)] = resource_set
+        error = check_futures(as_completed(futures)) or error
 
     if error:
         raise error
 
 
+def _group_by_tag(resources, key):
+    """Group resources by their value for the tag key.
+
+    Resources without the tag are left out.
+    """
+    groups = {}
+    for r in resources:
+        value = next(
+            (t['Value'] for t in r.get('Tags', ()) if t['Key'] == key), None)
+        if value is None:
+            continue
+        groups.setdefault(value, []).append(r)
+    return groups
+
+
 class TagTrim(Action):
     """Automatically remove tags from an ec2 resource.
 
@@ -182,6 +226,11 @@ class TagTrim(Action):
 
     permissions = ('ec2:DeleteTags',)
 
+    # Resources removing the same tags can be trimmed together in one
+    # delete_tags call, subclasses on apis that take many resources per
+    # call opt in by raising this.
+    batch_size = 1
+
     def process(self, resources):
         self.id_key = self.manager.get_model().id
 
@@ -191,22 +240,30 @@ class TagTrim(Action):
         client = utils.local_session(
             self.manager.session_factory).client(self.manager.resource_type.service)
 
+        resource_sets = {}
+        for r in resources:
+            candidates = self.get_candidates(r)
+            if candidates:
+                resource_sets.setdefault(tuple(candidates), []).append(r)
+
         futures = {}
         mid = self.manager.get_model().id
 
         with self.executor_factory(max_workers=2) as w:
-            for r in resources:
-                futures[w.submit(self.process_resource, client, r)] = r
-            for f in as_completed(futures):
+            for candidates, resource_set in resource_sets.items():
+                for batch in utils.chunks(resource_set, size=self.batch_size):
+                    futures[w.submit(
+                        self.process_resource_set, client, batch,
+                        list(candidates))] = batch
+            done, _ = wait(futures)
+            for f in done:
                 if f.exception():
                     self.log.warning(
-                        "Error processing tag-trim on resource:%s",
-                        futures[f][mid])
+                        "Error processing tag-trim on resources:%s %s",
+                        ", ".join([r[mid] for r in futures[f]]),
+                        f.exception())
 
-    def process_resource(self, client, i):
-        # Can't really go in batch parallel without some heuristics
-        # without some more complex matching wrt to grouping resources
-        # by common tags populations.
+    def get_candidates(self, i):
         tag_map = {
             t['Key']: t['Value'] for t in i.get('Tags', [])
             if not t['Key'].startswith('aws:')}
@@ -223,14 +280,25 @@ class TagTrim(Action):
             # Free up slots to fit
             remove = len(candidates) - (
                 self.max_tag_count - (self.space + len(preserve)))
-            candidates = list(sorted(candidates))[:remove]
+            candidates = heapq.nsmallest(remove, candidates)
+        else:
+            candidates = sorted(candidates)
 
         if not candidates:
             self.log.warning(
                 "Could not find any candidates to trim %s" % i[self.id_key])
             return
 
-        self.process_tag_removal(i, candidates)
+        return candidates
+
+    def process_resource_set(self, client, resource_set, tags):
+        if len(resource_set) == 1:
+            return self.process_tag_removal(client, resource_set[0], tags)
+        self.manager.retry(
+            client.delete_tags,
+            Tags=[{'Key': c} for c in tags],
+            Resources=[r[self.id_key] for r in resource_set],
+            DryRun=self.manager.config.dryrun)
 
     def process_tag_removal(self, client, resource, tags):
         self.manager.retry(
@@ -240,6 +308,12 @@ class TagTrim(Action):
             DryRun=self.manager.config.dryrun)
 
 
+class EC2TagTrim(TagTrim):
+    # ec2 delete_tags takes many resources per call, docs are inherited.
+
+    batch_size = 200
+
+
 class TagActionFilter(Filter):
     """Filter resources for tag specified future action
 
@@ -287,7 +361,13 @@ class TagActionFilter(Filter):
         op={'type': 'string'})
     schema_alias = True
 
-    current_date = None
+    def __init__(self, data, manager=None):
+        super(TagActionFilter, self).__init__(data, manager)
+        self.tag = self.data.get('tag', DEFAULT_TAG)
+        self.op = self.data.get('op', 'stop')
+        self.skew = self.data.get('skew', 0)
+        self.skew_hours = self.data.get('skew_hours', 0)
+        self.tz = tzutil.gettz(Time.TZ_ALIASES.get(self.data.get('tz', 'utc')))
 
     def validate(self):
         op = self.data.get('op')
@@ -295,19 +375,14 @@ class TagActionFilter(Filter):
             raise PolicyValidationError(
                 "Invalid marked-for-op op:%s in %s" % (op, self.manager.data))
 
-        tz = tzutil.gettz(Time.TZ_ALIASES.get(self.data.get('tz', 'utc')))
-        if not tz:
+        if not self.tz:
             raise PolicyValidationError(
                 "Invalid timezone specified '%s' in %s" % (
                     self.data.get('tz'), self.manager.data))
         return self
 
     def __call__(self, i):
-        tag = self.data.get('tag', DEFAULT_TAG)
-        op = self.data.get('op', 'stop')
-        skew = self.data.get('skew', 0)
-        skew_hours = self.data.get('skew_hours', 0)
-        tz = tzutil.gettz(Time.TZ_ALIASES.get(self.data.get('tz', 'utc')))
+        tag = self.tag
 
         v = None
         for n in i.get('Tags', ()):
@@ -315,15 +390,13 @@ class TagActionFilter(Filter):
                 v = n['Value']
                 break
 
-        if v is None:
-            return False
-        if ':' not in v or '@' not in v:
+        if v is None or '@' not in v or ':' not in v:
             return False
 
         msg, tgt = v.rsplit(':', 1)
         action, action_date_str = tgt.strip().split('@', 1)
 
-        if action != op:
+        if action != self.op:
             return False
 
         try:
@@ -331,17 +404,17 @@ class TagActionFilter(Filter):
         except Exception:
             self.log.warning("could not parse tag:%s value:%s on %s" % (
                 tag, v, i['InstanceId']))
-
-        if self.current_date is None:
-            self.current_date = datetime.now()
+            return False
 
         if action_date.tzinfo:
             # if action_date is timezone aware, set to timezone provided
-            action_date = action_date.astimezone(tz)
-            self.current_date = datetime.now(tz=tz)
+            action_date = action_date.astimezone(self.tz)
+            current_date = datetime.now(tz=self.tz)
+        else:
+            current_date = datetime.now()
 
-        return self.current_date >= (
-            action_date - timedelta(days=skew, hours=skew_hours))
+        return current_date >= (
+            action_date - timedelta(days=self.skew, hours=self.skew_hours))
 
 
 class TagCountFilter(Filter):
@@ -367,14 +440,16 @@ class TagCountFilter(Filter):
         op={'enum': list(OPERATORS.keys())})
     schema_alias = True
 
+    def __init__(self, data, manager=None):
+        super(TagCountFilter, self).__init__(data, manager)
+        self.count = self.data.get('count', 10)
+        self.op = OPERATORS.get(self.data.get('op', 'gte'))
+
     def __call__(self, i):
-        count = self.data.get('count', 10)
-        op_name = self.data.get('op', 'gte')
-        op = OPERATORS.get(op_name)
-        tag_count = len([
-            t['Key'] for t in i.get('Tags', [])
-            if not t['Key'].startswith('aws:')])
-        return op(tag_count, count)
+        tag_count = sum(
+            1 for t in i.get('Tags', ())
+            if not t['Key'].startswith('aws:'))
+        return self.op(tag_count, self.count)
 
 
 class Tag(Action):
@@ -400,6 +475,11 @@ class Tag(Action):
             raise PolicyValidationError(
                 "Can't specify both key and tag, choose one in %s" % (
                     self.manager.data,))
+        if not self.data.get('tags') and not (
+                self.data.get('value') or self.data.get('msg')):
+            raise PolicyValidationError(
+                "Must specify tags or a tag value in %s" % (
+                    self.manager.data,))
         return self
 
     def process(self, resources):
@@ -421,6 +501,9 @@ class Tag(Action):
         if msg:
             tags.append({'Key': tag, 'Value': msg})
 
+        if not tags or not resources:
+            return
+
         self.interpolate_values(tags)
 
         batch_size = self.data.get('batch_size', self.batch_size)
@@ -439,11 +522,15 @@ class Tag(Action):
             DryRun=self.manager.config.dryrun)
 
     def interpolate_values(self, tags):
+        # Static values, the common case, don't need formatting.
+        templates = [t for t in tags if '{' in t['Value']]
+        if not templates:
+            return
         params = {
             'account_id': self.manager.config.account_id,
             'now': utils.FormatDate.utcnow(),
             'region': self.manager.config.region}
-        for t in tags:
+        for t in templates:
             t['Value'] = t['Value'].format(**params)
 
     def get_client(self):
@@ -494,12 +581,14 @@ class RenameTag(Action):
     schema = utils.type_schema(
         'rename-tag',
         old_key={'type': 'string'},
-        new_key={'type': 'string'})
+        new_key={'type': 'string'},
+        max_workers={'type': 'integer', 'minimum': 1})
     schema_alias = True
 
     permissions = ('ec2:CreateTags', 'ec2:DeleteTags')
 
     tag_count_max = 50
+    batch_size = 1000
 
     def delete_tag(self, client, ids, key, value):
         client.delete_tags(
@@ -523,56 +612,44 @@ class RenameTag(Action):
         old_key = self.data.get('old_key')
         new_key = self.data.get('new_key')
 
+        headroom, full = [], []
+        for r in resource_set:
+            if len(r.get('Tags', ())) < self.tag_count_max:
+                headroom.append(r[self.id_key])
+            else:
+                full.append(r[self.id_key])
+
         # We have a preference to creating the new tag when possible first
-        resource_ids = [r[self.id_key] for r in resource_set if len(
-            r.get('Tags', [])) < self.tag_count_max]
-        if resource_ids:
-            self.create_tag(client, resource_ids, new_key, tag_value)
+        if headroom:
+            self.create_tag(client, headroom, new_key, tag_value)
 
-        self.delete_tag(
-            client, [r[self.id_key] for r in resource_set], old_key, tag_value)
+        self.delete_tag(client, headroom + full, old_key, tag_value)
 
         # For resources with 50 tags, we need to delete first and then create.
-        resource_ids = [r[self.id_key] for r in resource_set if len(
-            r.get('Tags', [])) > self.tag_count_max - 1]
-        if resource_ids:
-            self.create_tag(client, resource_ids, new_key, tag_value)
-
-    def create_set(self, instances):
-        old_key = self.data.get('old_key', None)
-        resource_set = {}
-        for r in instances:
-            tags = {t['Key']: t['Value'] for t in r.get('Tags', [])}
-            if tags[old_key] not in resource_set:
-                resource_set[tags[old_key]] = []
-            resource_set[tags[old_key]].append(r)
-        return resource_set
-
-    def filter_resources(self, resources):
-        old_key = self.data.get('old_key', None)
-        res = 0
-        for r in resources:
-            tags = {t['Key']: t['Value'] for t in r.get('Tags', [])}
-            if old_key not in tags.keys():
-                resources.pop(res)
-            res += 1
-        return resources
+        if full:
+            self.create_tag(client, full, new_key, tag_value)
 
     def process(self, resources):
         count = len(resources)
-        resources = self.filter_resources(resources)
+        resource_set = _group_by_tag(resources, self.data.get('old_key'))
+        resources = [r for rs in resource_set.values() for r in rs]
         self.log.info(
             "Filtered from %s resources to %s" % (count, len(resources)))
         self.id_key = self.manager.get_model().id
-        resource_set = self.create_set(resources)
+
+        batches = [
+            (r, batch) for r in resource_set
+            for batch in utils.chunks(resource_set[r], size=self.batch_size)]
+        workers = min(len(batches) or 1, self.data.get('max_workers', 3))
 
         client = self.get_client()
-        with self.executor_factory(max_workers=3) as w:
+        with self.executor_factory(max_workers=workers) as w:
             futures = []
-            for r in resource_set:
+            for r, batch in batches:
                 futures.append(
-                    w.submit(self.process_rename, client, r, resource_set[r]))
-            for f in as_completed(futures):
+                    w.submit(self.process_rename, client, r, batch))
+            done, _ = wait(futures)
+            for f in done:
                 if f.exception():
                     self.log.error(
                         "Exception renaming tag set \n %s" % (
@@ -742,11 +819,20 @@ class NormalizeTag(Action):
         key={'type': 'string'},
         action={'type': 'string',
                 'items': {
-                    'enum': ['upper', 'lower', 'title' 'strip', 'replace']}},
-        value={'type': 'string'})
+                    'enum': ['upper', 'lower', 'title', 'strip', 'replace']}},
+        value={'type': 'string'},
+        max_workers={'type': 'integer', 'minimum': 1})
 
     permissions = ('ec2:CreateTags',)
 
+    # action -> func(tag_value, value) returning the new tag value
+    transforms = {
+        'lower': lambda v, arg: v.lower(),
+        'upper': lambda v, arg: v.upper(),
+        'title': lambda v, arg: v.title(),
+        'strip': lambda v, arg: arg and v.replace(arg, '') or v,
+    }
+
     def create_tag(self, client, ids, key, value):
 
         self.manager.retry(
@@ -754,7 +840,7 @@ class NormalizeTag(Action):
             Resources=ids,
             Tags=[{'Key': key, 'Value': value}])
 
-    def process_transform(self, tag_value, resource_set):
+    def process_transform(self, client, tag_value, resource_set):
         """
         Transform tag value
 
@@ -766,65 +852,51 @@ class NormalizeTag(Action):
             len(resource_set)))
         key = self.data.get('key')
 
-        c = utils.local_session(self.manager.session_factory).client('ec2')
-
         self.create_tag(
-            c,
+            client,
             [r[self.id_key] for r in resource_set if len(
                 r.get('Tags', [])) < 50],
             key, tag_value)
 
-    def create_set(self, instances):
-        key = self.data.get('key', None)
-        resource_set = {}
-        for r in instances:
-            tags = {t['Key']: t['Value'] for t in r.get('Tags', [])}
-            if tags[key] not in resource_set:
-                resource_set[tags[key]] = []
-            resource_set[tags[key]].append(r)
-        return resource_set
-
-    def filter_resources(self, resources):
-        key = self.data.get('key', None)
-        res = 0
-        for r in resources:
-            tags = {t['Key']: t['Value'] for t in r.get('Tags', [])}
-            if key not in tags.keys():
-                resources.pop(res)
-            res += 1
-        return resources
-
     def process(self, resources):
         count = len(resources)
-        resources = self.filter_resources(resources)
+        resource_set = _group_by_tag(resources, self.data.get('key'))
+        resources = [r for rs in resource_set.values() for r in rs]
         self.log.info(
             "Filtered from %s resources to %s" % (count, len(resources)))
         self.id_key = self.manager.get_model().id
-        resource_set = self.create_set(resources)
-        with self.executor_factory(max_workers=3) as w:
+
+        transform = self.transforms.get(self.data.get('action'))
+        if transform is None:
+            return resources
+        value = self.data.get('value')
+
+        transformed = []
+        for r in resource_set:
+            new_value = transform(r, value)
+            if new_value and new_value != r:
+                transformed.append((new_value, resource_set[r]))
+        workers = min(len(transformed) or 1, self.data.get('max_workers', 3))
+
+        client = self.get_client()
+        with self.executor_factory(max_workers=workers) as w:
             futures = []
-            for r in resource_set:
-                action = self.data.get('action')
-                value = self.data.get('value')
-                new_value = False
-                if action == 'lower' and not r.islower():
-                    new_value = r.lower()
-                elif action == 'upper' and not r.isupper():
-                    new_value = r.upper()
-                elif action == 'title' and not r.istitle():
-                    new_value = r.title()
-                elif action == 'strip' and value and value in r:
-                    new_value = r.strip(value)
-                if new_value:
-                    futures.append(
-                        w.submit(self.process_transform, new_value, resource_set[r]))
-            for f in as_completed(futures):
+            for new_value, tag_resources in transformed:
+                futures.append(
+                    w.submit(self.process_transform, client, new_value,
+                             tag_resources))
+            done, _ = wait(futures)
+            for f in done:
                 if f.exception():
                     self.log.error(
                         "Exception renaming tag set \n %s" % (
                             f.exception()))
         return resources
 
+    def get_client(self):
+        return utils.local_session(self.manager.session_factory).client(
+            self.manager.resource_type.service)
+
 
 class UniversalTag(Tag):
     """Applies one or more tags to the specified resources.
@@ -850,6 +922,9 @@ class UniversalTag(Tag):
         if msg:
             tags[tag] = msg
 
+        if not tags or not resources:
+            return
+
         batch_size = self.data.get('batch_size', self.batch_size)
         client = self.get_client()
 
@@ -1006,7 +1081,10 @@ class CopyRelatedResourceTag(Tag):
 
     def validate(self):
         related_resource = self.data['resource']
-        if related_resource not in aws_resources.keys():
+        if related_resource not in aws_resources:
+            # the related resource's module may not be loaded yet
+            load_resources()
+        if related_resource not in aws_resources:
             raise PolicyValidationError(
                 "Error: Invalid resource type selected: %s" % related_resource
             )
@@ -1035,13 +1113,17 @@ class CopyRelatedResourceTag(Tag):
         tag_action.id_key = tag_action.manager.get_model().id
         client = tag_action.get_client()
 
+        tag_keys = self.data['tags']
+        if tag_keys != '*':
+            tag_keys = frozenset(tag_keys)
+
         stats = Counter()
 
         for related, r in related_resources.items():
             if related in missing_related_tags or not related_tag_map[related]:
                 stats['missing'] += 1
             elif self.process_resource(
-                    client, r, related_tag_map[related], self.data['tags'], tag_action):
+                    client, r, related_tag_map[related], tag_keys, tag_action):
                 stats['tagged'] += 1
             else:
                 stats['unchanged'] += 1
@@ -1090,48 +1172,66 @@ aws_resources.subscribe(
     aws_resources.EVENT_REGISTER, CopyRelatedResourceTag.register_resources)
 
 
-def universal_retry(method, ResourceARNList, **kw):
+def universal_retry(method, ResourceARNList, stop_event=None, **kw):
     """Retry support for resourcegroup tagging apis.
 
     The resource group tagging api typically returns a 200 status code
     with embedded resource specific errors. To enable resource specific
-    retry on throttles, we extract those, perform backoff w/ jitter and
-    continue. Other errors are immediately raised.
+    retry on throttles, we extract those, perform backoff w/ decorrelated
+    jitter and continue. Other errors are immediately raised.
+
+    Only throttled resources are retried, the last response is returned
+    with the not found resources from every attempt in its
+    FailedResourcesMap.
 
-    We do not aggregate unified resource responses across retries, only the
-    last successful response is returned for a subset of the resources if
-    a retry is performed.
+    An optional threading.Event can be passed as stop_event, setting it
+    cancels any pending retry instead of waiting out the backoff.
     """
     max_attempts = 6
+    min_delay, max_delay = 1.5, 2 ** 8
+    delay = min_delay
+    # A generator per call, so concurrent callers don't retry in step.
+    rand = random.Random()
+    not_found = {}
 
-    for idx, delay in enumerate(
-            utils.backoff_delays(1.5, 2 ** 8, jitter=True)):
+    for idx in range(max_attempts):
         response = method(ResourceARNList=ResourceARNList, **kw)
-        failures = response.get('FailedResourcesMap', {})
+        failures = response.get('FailedResourcesMap')
         if not failures:
-            return response
+            break
 
         errors = {}
         throttles = set()
 
-        for f_arn in failures:
-            error_code = failures[f_arn]['ErrorCode']
+        for f_arn, failure in failures.items():
+            error_code = failure['ErrorCode']
             if error_code == 'ThrottlingException':
                 throttles.add(f_arn)
             elif error_code == 'ResourceNotFoundException':
-                continue
+                not_found[f_arn] = failure
             else:
                 errors[f_arn] = error_code
 
         if errors:
             raise Exception("Resource Tag Errors %s" % (errors))
 
+        if not throttles:
+            break
+
         if idx == max_attempts - 1:
             raise Exception("Resource Tag Throttled %s" % (", ".join(throttles)))
 
-        time.sleep(delay)
+        delay = min(max_delay, rand.uniform(min_delay, delay * 3))
+        if stop_event is None:
+            time.sleep(delay)
+        elif stop_event.wait(delay):
+            raise Exception("Resource Tag Retry Cancelled %s" % (", ".join(throttles)))
         ResourceARNList = list(throttles)
 
+    if not_found:
+        response['FailedResourcesMap'] = not_found
+    return response
+
 
 def coalesce_copy_user_tags(resource, copy_tags, user_tags):
     """
@@ -1162,23 +1262,20 @@ def coalesce_copy_user_tags(resource, copy_tags, user_tags):
 
     r_tags = resource.get('Tags', [])
 
-    if isinstance(copy_tags, list):
-        if '*' in copy_tags:
-            copy_keys = set([t['Key'] for t in r_tags])
-        else:
-            copy_keys = set(copy_tags)
-
-    if isinstance(copy_tags, bool):
-        if copy_tags is True:
-            copy_keys = set([t['Key'] for t in r_tags])
-        else:
-            copy_keys = set()
-
     if isinstance(user_tags, dict):
         user_tags = [{'Key': k, 'Value': v} for k, v in user_tags.items()]
-
-    user_keys = set([t['Key'] for t in user_tags])
-    tags_diff = list(copy_keys.difference(user_keys))
-    resource_tags_to_copy = [t for t in r_tags if t['Key'] in tags_diff]
-    user_tags.extend(resource_tags_to_copy)
+    else:
+        user_tags = list(user_tags)
+
+    if copy_tags is True or (copy_tags and '*' in copy_tags):
+        copy_keys = None
+    elif copy_tags:
+        copy_keys = frozenset(copy_tags)
+    else:
+        return user_tags
+
+    user_keys = {t['Key'] for t in user_tags}
+    user_tags.extend(
+        t for t in r_tags if t['Key'] not in user_keys and (
+            copy_keys is None or t['Key'] in copy_keys))
     return user_tags
@@ -48,6 +48,13 @@ else:
         except ImportError:
             SafeLoader = None
 
+# Prefer a c json parser when available, config items and
+# policy files can be sizable.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 log = logging.getLogger('custodian.utils')
 
 
@@ -105,6 +112,8 @@ def yaml_load(value):
 
 
 def loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
     return json.loads(body)
 
 
@@ -15,6 +15,9 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 from botocore.exceptions import ClientError
 
+from c7n.executor import MainThreadExecutor
+from c7n.query import ChildResourceManager
+
 from .common import BaseTest
 
 
@@ -94,6 +97,7 @@ class TestRestApi(BaseTest):
 class TestRestResource(BaseTest):
 
     def test_rest_resource_query(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_rest_resource_resource")
         p = self.load_policy(
             {"name": "all-rest-resources", "resource": "rest-resource"},
@@ -208,6 +212,7 @@ class TestRestResource(BaseTest):
         self.assertEqual(method['methodIntegration']['timeoutInMillis'], 29000)
 
     def test_rest_resource_method_update(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_rest_resource_method_update")
         p = self.load_policy(
             {
@@ -256,6 +261,7 @@ class TestRestResource(BaseTest):
 class TestRestStage(BaseTest):
 
     def test_rest_stage_resource(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_rest_stage")
         p = self.load_policy(
             {
@@ -270,6 +276,7 @@ class TestRestStage(BaseTest):
         self.assertEqual(resources[0]["stageName"], "latest")
 
     def test_rest_stage_update(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_rest_stage_update")
         p = self.load_policy(
             {
@@ -19,11 +19,14 @@ from unittest import TestCase
 from .common import event_data, BaseTest, TestConfig as Config
 
 from c7n.cwe import CloudWatchEvents
+from c7n.executor import MainThreadExecutor
+from c7n.query import ChildResourceManager
 
 
 class CloudWatchRuleTarget(BaseTest):
 
     def test_target_cross_account_remove(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_cwe_rule_target_cross")
         client = session_factory().client("events")
         policy = self.load_policy(
@@ -656,8 +656,10 @@ class TestTag(BaseTest):
             },
             session_factory=session_factory,
         )
+        # the action skips the instance without the tag, but leaves
+        # the policy's resources as is.
         resources = policy.run()
-        self.assertEqual(len(resources), 3)
+        self.assertEqual(len(resources), 4)
 
         policy = self.load_policy(
             {
@@ -20,6 +20,8 @@ import os
 import time
 
 from c7n.exceptions import PolicyExecutionError
+from c7n.executor import MainThreadExecutor
+from c7n.query import ChildResourceManager
 
 
 class TestEcsService(BaseTest):
@@ -329,6 +331,7 @@ class TestEcsTask(BaseTest):
         self.assertEqual(len(resources), 4)
 
     def test_task_delete(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_ecs_task_delete")
         p = self.load_policy(
             {
@@ -349,6 +352,7 @@ class TestEcsTask(BaseTest):
 class TestEcsContainerInstance(BaseTest):
 
     def test_container_instance_resource(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data("test_ecs_container_instance")
         p = self.load_policy(
             {"name": "container-instances", "resource": "ecs-container-instance"},
@@ -358,6 +362,7 @@ class TestEcsContainerInstance(BaseTest):
         self.assertEqual(len(resources), 1)
 
     def test_container_instance_update_agent(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data(
             "test_ecs_container_instance_update_agent"
         )
@@ -390,6 +395,7 @@ class TestEcsContainerInstance(BaseTest):
         )
 
     def test_container_instance_set_state(self):
+        self.patch(ChildResourceManager, "executor_factory", MainThreadExecutor)
         session_factory = self.replay_flight_data(
             "test_ecs_container_instance_set_state"
         )
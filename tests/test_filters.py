@@ -452,6 +452,18 @@ class TestMarkedForAction(BaseFilterTest):
         ]:
             self.assertFilter({"type": "marked-for-op"}, ii, v)
 
+    def test_filter_action_date_mixed_tz(self):
+        f = filters.factory({"type": "marked-for-op"})
+        yesterday = datetime.now() - timedelta(1)
+
+        def i(v):
+            return instance(
+                Tags=[{"Key": "maid_status", "Value": "not compliant: stop@%s" % v}])
+
+        self.assertTrue(f(i(yesterday.strftime("%Y/%m/%d %H%M UTC"))))
+        self.assertTrue(f(i(yesterday.strftime("%Y/%m/%d"))))
+        self.assertFalse(f(i("not-a-date")))
+
 
 class EventFilterTest(BaseFilterTest):
 
@@ -46,6 +46,7 @@ class HandleTest(BaseTest):
         from c7n import handler
 
         self.patch(handler, "account_id", "111222333444555")
+        self.patch(handler, "policy_config", None)
 
         with open(os.path.join(self.run_dir, "config.json"), "w") as fh:
             json.dump(
@@ -66,7 +67,11 @@ class HandleTest(BaseTest):
             handler.dispatch_event({"detail": {"errorCode": "404"}}, None), None
         )
         self.assertEqual(handler.dispatch_event({"detail": {}}, None), True)
-        self.assertEqual(policy_execution, [({"detail": {}, "debug": True}, None)])
+        self.assertEqual(policy_execution, [({"detail": {}}, None)])
+
+        self.change_environment(C7N_OUTPUT_DIR=self.run_dir, C7N_DEBUG_EVENT="yes")
+        self.assertEqual(handler.dispatch_event({"detail": {}}, None), True)
+        self.assertEqual(policy_execution[-1], ({"detail": {}, "debug": True}, None))
 
         config = handler.Config.empty()
         self.assertEqual(config.assume_role, None)
@@ -76,3 +81,36 @@ class HandleTest(BaseTest):
             pass
         else:
             self.fail("should have raised an error")
+
+    def test_init_cold_start(self):
+        self.run_dir = self.change_cwd()
+
+        from c7n import handler
+
+        self.patch(handler, "account_id", None)
+        self.patch(handler, "policy_config", None)
+        self.patch(
+            handler, "get_account_id_from_sts", lambda session: "111222333444555")
+
+        config = {"policies": [{"resource": "asg", "name": "autoscaling"}]}
+        with open(os.path.join(self.run_dir, "config.json"), "w") as fh:
+            json.dump(config, fh)
+
+        handler.init_cold_start()
+        self.assertEqual(handler.account_id, "111222333444555")
+        self.assertEqual(handler.policy_config, config)
+
+    def test_load_policy_config_cached(self):
+        self.run_dir = self.change_cwd()
+
+        from c7n import handler
+
+        self.patch(handler, "policy_config", None)
+        config_path = os.path.join(self.run_dir, "config.json")
+        with open(config_path, "w") as fh:
+            json.dump({"policies": []}, fh)
+
+        config = handler.load_policy_config()
+        self.assertEqual(config, {"policies": []})
+        os.remove(config_path)
+        self.assertIs(handler.load_policy_config(), config)
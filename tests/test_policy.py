@@ -17,7 +17,10 @@ from datetime import datetime, timedelta
 import json
 import logging
 import mock
+import os
 import shutil
+import subprocess
+import sys
 import tempfile
 
 from c7n import policy, manager
@@ -157,6 +160,36 @@ class PolicyPermissions(BaseTest):
         if bad:
             self.fail("%s have config types but no config source" % (", ".join(bad)))
 
+    def test_resource_module_map(self):
+        from c7n.resources import RESOURCE_MODULE_MAP
+        missing = []
+        for k, v in manager.resources.items():
+            if v.__module__.rsplit('.', 1)[-1] not in RESOURCE_MODULE_MAP.get(k, ()):
+                missing.append(k)
+        if missing:
+            self.fail(
+                "%s missing or incorrect in resource module map" % (", ".join(missing)))
+
+    def test_targeted_resource_load_related(self):
+        # needs a fresh interpreter, our test process has loaded everything.
+        script = "\n".join([
+            "from c7n.resources import load_resources",
+            "load_resources({'asg'})",
+            "from c7n.config import Config",
+            "from c7n.policy import Policy",
+            "p = Policy({'name': 'asg-invalid', 'resource': 'asg', 'filters': [",
+            "    'invalid', {'type': 'image-age', 'days': 30}]}, Config.empty())",
+            "p.validate()",
+            "m = p.resource_manager",
+            "print(m.get_resource_manager('subnet').type)",
+            "print(m.get_resource_manager('ami').type)"])
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+            [p for p in [env.get('PYTHONPATH')] if p])
+        output = subprocess.check_output([sys.executable, '-c', script], env=env)
+        self.assertEqual(output.decode('utf8').split(), ['subnet', 'ami'])
+
     def test_resource_name(self):
         names = []
         for k, v in manager.resources.items():
@@ -144,3 +144,16 @@ class QueryResourceManagerTest(BaseTest):
         self.assertEqual(len(resources), 1)
         resources = p.resource_manager.get_resources(["igw-5bce113f"])
         self.assertEqual(resources, [])
+
+
+class ConfigSourceTest(BaseTest):
+
+    def test_get_resources_history_fallback(self):
+        factory = self.replay_flight_data("test_config_source_history_fallback")
+        p = self.load_policy(
+            {"name": "lambda-config", "resource": "lambda", "source": "config"},
+            session_factory=factory,
+        )
+        resources = p.resource_manager.get_resources(["omnissm-register"])
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(resources[0]["FunctionName"], "omnissm-register")
@@ -72,6 +72,16 @@ class RDSClusterTest(BaseTest):
         resources = p.run()
         self.assertEqual(len(resources), 2)
 
+    def test_rdscluster_get_resources(self):
+        session_factory = self.replay_flight_data("test_rdscluster_simple")
+        p = self.load_policy(
+            {"name": "rdscluster-get", "resource": "rds-cluster"},
+            session_factory=session_factory,
+        )
+        resources = p.resource_manager.get_resources(["aaa", "bbb"], augment=False)
+        self.assertEqual(
+            sorted(r["DBClusterIdentifier"] for r in resources), ["aaa", "bbb"])
+
     def test_rdscluster_simple_filter(self):
         self.remove_augments()
         session_factory = self.replay_flight_data("test_rdscluster_simple")
@@ -399,3 +409,35 @@ class RDSClusterSnapshotTest(BaseTest):
         )
         resources = p.run()
         self.assertEqual(len(resources), 2)
+
+    def test_rdscluster_snapshot_delete_batches(self):
+        factory = self.replay_flight_data("test_rdscluster_snapshot_delete")
+        p = self.load_policy(
+            {
+                "name": "rdscluster-snapshot-delete",
+                "resource": "rds-cluster-snapshot",
+                "actions": ["delete"],
+            },
+            session_factory=factory,
+        )
+        action = p.resource_manager.actions[0]
+        self.patch(action, "executor_factory", MainThreadExecutor)
+        deleted = []
+
+        def process_snapshot_set(client, snapshot_set):
+            # each set holds the snapshots of a single cluster
+            self.assertEqual(
+                len(set(s["DBClusterIdentifier"] for s in snapshot_set)), 1)
+            deleted.extend(snapshot_set)
+
+        self.patch(action, "process_snapshot_set", process_snapshot_set)
+        snapshots = [
+            {"DBClusterSnapshotIdentifier": "snap-%d" % i,
+             "DBClusterIdentifier": "cluster-%d" % (i % 7),
+             "Status": i % 5 and "available" or "deleting"}
+            for i in range(520)]
+        self.assertEqual(action.process(snapshots), snapshots)
+        self.assertEqual(
+            sorted(s["DBClusterSnapshotIdentifier"] for s in deleted),
+            sorted(s["DBClusterSnapshotIdentifier"] for s in snapshots
+                   if s["Status"] == "available"))
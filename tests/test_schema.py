@@ -14,10 +14,13 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import mock
+import unittest
 from json import dumps
+from jsonschema import Draft4Validator
 from jsonschema.exceptions import best_match
 
 from c7n.manager import resources
+from c7n import schema
 from c7n.schema import Validator, validate, generate, specific_error
 from .common import BaseTest
 
@@ -60,6 +63,187 @@ class SchemaTest(BaseTest):
     def test_empty_skeleton(self):
         self.assertEqual(validate({"policies": []}), [])
 
+    def test_fast_schema(self):
+        self.assertEqual(
+            schema._fast_schema({
+                "required": ("name",),
+                "properties": {
+                    "rules": {"type": "array", "required": True},
+                    "type": {"enum": ("a", "b")}}}),
+            {"required": ["name"],
+             "properties": {
+                 "rules": {"type": "array"},
+                 "type": {"enum": ["a", "b"]}}})
+
+    def test_fast_validator_disabled(self):
+        self.change_environment(C7N_FAST_VALIDATE="no")
+        self.assertEqual(schema._fast_validator({}), None)
+
+    def test_schema_keyword_types(self):
+        # jsonschema tolerates some malformed subschemas that compiled
+        # validators reject, ie. a string 'False' for additionalProperties.
+        bad = []
+
+        def check(node, path):
+            if not isinstance(node, dict):
+                return
+            for k, v in node.items():
+                if k in ('additionalProperties', 'additionalItems'):
+                    if not isinstance(v, (bool, dict)):
+                        bad.append("%s/%s" % (path, k))
+                elif k == 'properties' and isinstance(v, dict):
+                    bad.extend("%s/properties/%s" % (path, pk)
+                               for pk, pv in v.items() if not isinstance(pv, dict))
+                if isinstance(v, dict):
+                    check(v, "%s/%s" % (path, k))
+                elif isinstance(v, (list, tuple)):
+                    for idx, i in enumerate(v):
+                        check(i, "%s/%s/%d" % (path, k, idx))
+
+        check(generate(), "")
+        self.assertEqual(bad, [])
+
+    @unittest.skipIf(schema.fastjsonschema is None, "fastjsonschema not installed")
+    def test_fast_validator_compiles(self):
+        self.patch(schema, "_fast_validators", {})
+        policies = [
+            {"policies": [{"name": "ec2-stopped", "resource": "ec2",
+                           "filters": [{"State.Name": "stopped"}],
+                           "actions": ["stop"]}]},
+            {"policies": [{"name": "ebs-shrink", "resource": "ebs",
+                           "filters": ["modifyable"],
+                           "actions": [{"type": "modify", "size-percent": 50,
+                                        "shrink": True}]}]},
+            {"policies": [{"name": "ec2-bad-action", "resource": "ec2",
+                           "actions": [{"type": "nonexistent"}]}]},
+            {"policies": [{"name": "ec2-bad-filter", "resource": "ec2",
+                           "filters": [{"type": "instance-age", "days": "x"}]}]},
+        ]
+        for p in policies:
+            self.assertIsNotNone(schema._fast_validator(
+                schema._cached_schema(schema._used_resources(p))))
+        fast = [[str(e) for e in validate(p)] for p in policies]
+        self.change_environment(C7N_FAST_VALIDATE="no")
+        slow = [[str(e) for e in validate(p)] for p in policies]
+        self.assertEqual(fast, slow)
+        self.assertEqual(fast[:2], [[], []])
+
+    def test_fast_validator_draft4(self):
+        class JsonSchemaException(Exception):
+            pass
+
+        compiled = []
+
+        def compile(fast_schema):
+            # Stand in for fastjsonschema, using the draft it's asked for.
+            compiled.append(fast_schema['$schema'])
+            fast_validator = Draft4Validator(fast_schema)
+
+            def fast_validate(data):
+                if not fast_validator.is_valid(data):
+                    raise JsonSchemaException()
+                return data
+            return fast_validate
+
+        self.patch(schema, "fastjsonschema", mock.MagicMock(
+            compile=compile, JsonSchemaException=JsonSchemaException))
+        self.patch(schema, "_fast_validators", {})
+        policies = [
+            {"policies": [{"name": "ec2-stopped", "resource": "ec2",
+                           "filters": [{"State.Name": "stopped"}],
+                           "actions": ["stop"]}]},
+            {"policies": [{"name": "ec2-bad-action", "resource": "ec2",
+                           "actions": [{"type": "nonexistent"}]}]},
+            {"policies": [{"name": "ec2-bad-filter", "resource": "ec2",
+                           "filters": [{"type": "instance-age", "days": "x"}]}]},
+        ]
+        fast = [[str(e) for e in validate(p)] for p in policies]
+        self.change_environment(C7N_FAST_VALIDATE="no")
+        slow = [[str(e) for e in validate(p)] for p in policies]
+        self.assertEqual(fast, slow)
+        self.assertEqual(fast[0], [])
+        self.assertTrue(fast[1] and fast[2])
+        self.assertEqual(
+            set(compiled), {"http://json-schema.org/draft-04/schema#"})
+
+    def test_cached_schema(self):
+        self.patch(schema, "_schemas", {})
+        self.assertIs(schema._cached_schema(), schema._cached_schema())
+        self.assertIsNot(
+            schema._cached_schema(["ec2"]), schema._cached_schema())
+        self.assertEqual(len(schema._schemas), 2)
+
+    def test_cached_schema_eviction(self):
+        self.patch(schema, "_schemas", {i: {} for i in range(9)})
+        self.patch(schema, "_fast_validators", {1: ({}, None)})
+        self.patch(schema, "_resource_indexes", {})
+        schema._resource_index([{"$ref": "#/definitions/resources/aws.ec2/policy"}])
+        self.assertEqual(len(schema._resource_indexes), 1)
+        schema._cached_schema(["ec2"])
+        self.assertEqual(len(schema._schemas), 1)
+        self.assertEqual(schema._fast_validators, {})
+        self.assertEqual(schema._resource_indexes, {})
+
+    def test_used_resources(self):
+        self.assertEqual(
+            schema._used_resources({"policies": [
+                {"name": "a", "resource": "ec2"},
+                {"name": "b", "resource": "aws.s3"}]}),
+            {"ec2", "s3"})
+        # unknown or missing types validate against the full schema
+        self.assertEqual(
+            schema._used_resources({"policies": [
+                {"name": "a", "resource": "ec2"},
+                {"name": "b", "resource": "ec3"}]}),
+            set())
+        self.assertEqual(
+            schema._used_resources({"policies": [{"name": "a"}]}), set())
+        self.assertEqual(schema._used_resources({"policies": {}}), set())
+
+    def test_iam_statement(self):
+        def policy(**statement):
+            statement.update({"Sid": "s", "Effect": "Allow"})
+            return {"policies": [{
+                "name": "sns-policy", "resource": "sns",
+                "actions": [{
+                    "type": "modify-policy",
+                    "add-statements": [statement],
+                    "remove-statements": []}]}]}
+
+        self.assertEqual(
+            validate(policy(Principal="*", Action="sns:Publish", Resource="*")), [])
+        self.assertEqual(
+            validate(policy(NotPrincipal={"AWS": "*"}, NotAction="sns:Publish",
+                            NotResource="*")), [])
+        # exactly one of each pair is required
+        self.assertTrue(validate(policy(Action="sns:Publish", Resource="*")))
+        self.assertTrue(
+            validate(policy(Principal="*", Action="sns:Publish",
+                            NotAction="sns:Publish", Resource="*")))
+
+    def test_policy_any_of_matches_draft4(self):
+        from jsonschema import Draft4Validator
+        full = generate()
+        for p in ({"name": "x", "resource": "ec2",
+                   "actions": [{"type": "nope"}]},
+                  {"name": "x", "resource": "aws.s3",
+                   "filters": [{"type": "value", "key": "a", "op": "nope"}]},
+                  {"name": "x", "resource": "ec3"}):
+            expected = [str(specific_error(e)) for e in
+                        Draft4Validator(full).iter_errors({"policies": [p]})]
+            errors = [str(specific_error(e)) for e in
+                      Validator(full).iter_errors({"policies": [p]})]
+            self.assertTrue(errors)
+            self.assertEqual(errors, expected)
+
+    def test_policy_name(self):
+        for name in ("ec2-stop", "ec2_userdata", "Ec2Stop1", "a-b-c"):
+            self.assertEqual(
+                validate({"policies": [{"name": name, "resource": "ec2"}]}), [])
+        for name in ("ec2-", "-ec2", "1ec2", "ec2[x]", "ec2^", "ec2 stop"):
+            self.assertTrue(
+                validate({"policies": [{"name": name, "resource": "ec2"}]}))
+
     def test_duplicate_policies(self):
         data = {
             "policies": [
@@ -16,10 +16,16 @@ module to test some universal tagging infrastructure not directly exposed.
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import threading
 import time
 from mock import MagicMock, call
 
-from c7n.tags import universal_retry, coalesce_copy_user_tags
+from c7n import utils
+from c7n.config import Bag
+from c7n.executor import MainThreadExecutor
+from c7n.tags import (
+    EC2TagTrim, NormalizeTag, RenameTag, Tag, TagTrim, universal_retry, universal_tag_map,
+    coalesce_copy_user_tags, _group_by_tag, _common_tag_processer)
 from c7n.exceptions import PolicyExecutionError, PolicyValidationError
 
 from .common import BaseTest
@@ -52,6 +58,62 @@ class UniversalTagRetry(BaseTest):
             ]
         )
 
+    def test_retry_throttled_backoff(self):
+        sleep = MagicMock()
+        self.patch(time, "sleep", sleep)
+        method = MagicMock()
+        method.return_value = {
+            "FailedResourcesMap": {"arn:abc": {"ErrorCode": "ThrottlingException"}}}
+        self.assertRaises(Exception, universal_retry, method, ["arn:abc"])
+        self.assertEqual(method.call_count, 6)
+        delays = [c[0][0] for c in sleep.call_args_list]
+        self.assertEqual(len(delays), 5)
+        prev = 1.5
+        for d in delays:
+            self.assertTrue(1.5 <= d <= min(256, prev * 3))
+            prev = d
+
+    def test_retry_stop_event(self):
+        sleep = MagicMock()
+        self.patch(time, "sleep", sleep)
+        stop_event = threading.Event()
+        stop_event.set()
+        method = MagicMock()
+        method.return_value = {
+            "FailedResourcesMap": {"arn:abc": {"ErrorCode": "ThrottlingException"}}}
+        with self.assertRaises(Exception) as ecm:
+            universal_retry(method, ["arn:abc"], stop_event=stop_event)
+        self.assertIn("Cancelled", str(ecm.exception))
+        method.assert_called_once_with(ResourceARNList=["arn:abc"])
+        sleep.assert_not_called()
+
+    def test_retry_not_found_aggregated(self):
+        sleep = MagicMock()
+        self.patch(time, "sleep", sleep)
+        method = MagicMock()
+        method.side_effect = [
+            {"FailedResourcesMap": {
+                "arn:abc": {"ErrorCode": "ThrottlingException"},
+                "arn:def": {"ErrorCode": "ResourceNotFoundException"}}},
+            {"FailedResourcesMap": {}},
+        ]
+        self.assertEqual(
+            universal_retry(method, ["arn:abc", "arn:def", "arn:ghi"]),
+            {"FailedResourcesMap": {
+                "arn:def": {"ErrorCode": "ResourceNotFoundException"}}})
+        self.assertEqual(method.call_count, 2)
+
+    def test_retry_only_not_found(self):
+        sleep = MagicMock()
+        self.patch(time, "sleep", sleep)
+        method = MagicMock()
+        method.side_effect = [
+            {"FailedResourcesMap": {
+                "arn:def": {"ErrorCode": "ResourceNotFoundException"}}}]
+        universal_retry(method, ["arn:def"])
+        method.assert_called_once()
+        sleep.assert_not_called()
+
     def test_retry_pass_error(self):
         method = MagicMock()
         method.side_effect = [
@@ -60,6 +122,204 @@ class UniversalTagRetry(BaseTest):
         self.assertRaises(Exception, universal_retry, method, ["arn:abc"])
 
 
+class UniversalTagMap(BaseTest):
+
+    def test_tag_map_batches_resource_types(self):
+        client = MagicMock()
+        paginator = client.get_paginator.return_value
+        paginator.paginate.side_effect = [
+            [{"ResourceTagMappingList": [
+                {"ResourceARN": "arn:abc", "Tags": [{"Key": "a", "Value": "1"}]}]},
+             {"ResourceTagMappingList": [
+                 {"ResourceARN": "arn:def", "Tags": []}]}],
+            [{"ResourceTagMappingList": [
+                {"ResourceARN": "arn:ghi", "Tags": [{"Key": "b", "Value": "2"}]}]}],
+        ]
+        resource_types = ["svc:type%d" % i for i in range(150)]
+        self.assertEqual(
+            universal_tag_map(client, resource_types),
+            {"arn:abc": [{"Key": "a", "Value": "1"}],
+             "arn:def": [],
+             "arn:ghi": [{"Key": "b", "Value": "2"}]})
+        self.assertEqual(
+            paginator.paginate.call_args_list,
+            [call(ResourceTypeFilters=resource_types[:100]),
+             call(ResourceTypeFilters=resource_types[100:])])
+
+
+class CommonTagProcesser(BaseTest):
+
+    def test_process_batches_with_error(self):
+        processed = []
+
+        def process_resource_set(client, resource_set, tags):
+            processed.append([r["Id"] for r in resource_set])
+            if resource_set[0]["Id"] == 4:
+                raise ValueError("bad batch")
+
+        log = MagicMock()
+        resources = [{"Id": i} for i in range(10)]
+        self.assertRaises(
+            ValueError, _common_tag_processer,
+            MainThreadExecutor, 2, 2, None, process_resource_set,
+            "Id", resources, {"k": "v"}, log)
+        self.assertEqual(
+            processed, [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]])
+        log.error.assert_called_once()
+        self.assertEqual(log.error.call_args[0][2], 2)
+
+    def test_process_workers_bounded_by_batches(self):
+        workers = []
+
+        def executor_factory(max_workers):
+            workers.append(max_workers)
+            return MainThreadExecutor(max_workers=max_workers)
+
+        for count in (1, 3, 30):
+            _common_tag_processer(
+                executor_factory, 10, 2, None, MagicMock(), "Id",
+                [{"Id": i} for i in range(count)], {}, MagicMock())
+        self.assertEqual(workers, [1, 1, 2])
+
+
+class TagValidate(BaseTest):
+
+    def test_tag_requires_value(self):
+        manager = Bag(data={"name": "test"})
+        self.assertRaises(
+            PolicyValidationError, Tag({"key": "k"}, manager).validate)
+        self.assertRaises(
+            PolicyValidationError, Tag({"tags": {}}, manager).validate)
+        Tag({"key": "k", "value": "v"}, manager).validate()
+        Tag({"tags": {"k": "v"}}, manager).validate()
+
+
+class InterpolateTagValues(BaseTest):
+
+    def test_interpolate_values(self):
+        manager = Bag(config=Bag(account_id="123456789012", region="us-east-2"))
+        tags = [{"Key": "static", "Value": "abc"},
+                {"Key": "owner", "Value": "{account_id}-{region}"}]
+        Tag({}, manager).interpolate_values(tags)
+        self.assertEqual(
+            tags,
+            [{"Key": "static", "Value": "abc"},
+             {"Key": "owner", "Value": "123456789012-us-east-2"}])
+
+
+class NormalizeTagValues(BaseTest):
+
+    def test_normalize_strip_substring(self):
+        manager = MagicMock()
+        manager.get_model.return_value.id = "Id"
+        manager.retry.side_effect = lambda f, **kw: f(**kw)
+        client = MagicMock()
+        action = NormalizeTag(
+            {"key": "env", "action": "strip", "value": "-old"}, manager)
+        action.executor_factory = MainThreadExecutor
+        action.get_client = lambda: client
+        action.process([
+            {"Id": "a", "Tags": [{"Key": "env", "Value": "dev-old"}]},
+            {"Id": "b", "Tags": [{"Key": "env", "Value": "prod"}]},
+            {"Id": "c", "Tags": [{"Key": "env", "Value": "old-d"}]}])
+        client.create_tags.assert_called_once_with(
+            Resources=["a"], Tags=[{"Key": "env", "Value": "dev"}])
+
+
+class RenameTagBatch(BaseTest):
+
+    def test_rename_tag_batches(self):
+        self.patch(RenameTag, "tag_count_max", 2)
+        self.patch(RenameTag, "batch_size", 2)
+        manager = MagicMock()
+        manager.get_model.return_value.id = "Id"
+        client = MagicMock()
+        action = RenameTag({"old_key": "old", "new_key": "new"}, manager)
+        action.executor_factory = MainThreadExecutor
+        action.get_client = lambda: client
+        action.process([
+            {"Id": "a", "Tags": [{"Key": "old", "Value": "v"}]},
+            {"Id": "b", "Tags": [{"Key": "old", "Value": "v"},
+                                 {"Key": "other", "Value": "x"}]},
+            {"Id": "c", "Tags": [{"Key": "old", "Value": "v"}]}])
+        self.assertEqual(
+            client.method_calls,
+            [call.create_tags(Resources=["a"], Tags=[{"Key": "new", "Value": "v"}]),
+             call.delete_tags(Resources=["a", "b"], Tags=[{"Key": "old", "Value": "v"}]),
+             call.create_tags(Resources=["b"], Tags=[{"Key": "new", "Value": "v"}]),
+             call.create_tags(Resources=["c"], Tags=[{"Key": "new", "Value": "v"}]),
+             call.delete_tags(Resources=["c"], Tags=[{"Key": "old", "Value": "v"}])])
+
+
+class TagTrimBatch(BaseTest):
+
+    def test_tag_trim_groups_candidates(self):
+        self.patch(TagTrim, "max_tag_count", 3)
+        manager = MagicMock()
+        manager.get_model.return_value.id = "Id"
+        manager.config.dryrun = False
+        manager.retry.side_effect = lambda f, **kw: f(**kw)
+        client = MagicMock()
+        self.patch(
+            utils, "local_session",
+            lambda factory: MagicMock(client=lambda service: client))
+
+        def r(rid, *keys):
+            return {"Id": rid, "Tags": [{"Key": k, "Value": ""} for k in keys]}
+
+        action = EC2TagTrim({"space": 1, "preserve": ["keep"]}, manager)
+        action.executor_factory = MainThreadExecutor
+        action.process([
+            r("a", "keep", "x", "y"),
+            r("b", "keep", "y", "x"),
+            r("c", "keep", "w", "z"),
+            r("d", "keep", "x")])
+        self.assertEqual(client.delete_tags.call_count, 2)
+        client.delete_tags.assert_any_call(
+            Resources=["a", "b"], Tags=[{"Key": "x"}], DryRun=False)
+        client.delete_tags.assert_any_call(
+            Resources=["c"], Tags=[{"Key": "w"}], DryRun=False)
+
+    def test_tag_trim_subclass_per_resource(self):
+        self.patch(TagTrim, "max_tag_count", 3)
+        manager = MagicMock()
+        manager.get_model.return_value.id = "Id"
+        client = MagicMock()
+        self.patch(
+            utils, "local_session",
+            lambda factory: MagicMock(client=lambda service: client))
+        removed = []
+
+        class OtherTagTrim(TagTrim):
+            def process_tag_removal(self, client, resource, tags):
+                removed.append((resource["Id"], tags))
+
+        action = OtherTagTrim({"space": 1, "preserve": []}, manager)
+        action.executor_factory = MainThreadExecutor
+        action.process([
+            {"Id": rid, "Tags": [{"Key": k, "Value": ""} for k in "xyz"]}
+            for rid in ("a", "b")])
+        self.assertEqual(sorted(removed), [("a", ["x"]), ("b", ["x"])])
+        client.delete_tags.assert_not_called()
+
+
+class GroupByTag(BaseTest):
+
+    def test_group_by_tag(self):
+        resources = [
+            {"Id": "a", "Tags": [{"Key": "env", "Value": "dev"}]},
+            {"Id": "b"},
+            {"Id": "c", "Tags": [{"Key": "other", "Value": "dev"}]},
+            {"Id": "d", "Tags": [{"Key": "env", "Value": "prod"}]},
+            {"Id": "e", "Tags": [{"Key": "env", "Value": "dev"}]},
+        ]
+        groups = _group_by_tag(resources, "env")
+        self.assertEqual(
+            {k: [r["Id"] for r in v] for k, v in groups.items()},
+            {"dev": ["a", "e"], "prod": ["d"]})
+        self.assertEqual(len(resources), 5)
+
+
 class CoalesceCopyUserTags(BaseTest):
     def test_copy_bool_user_tags(self):
         tags = [{'Key': 'test-key', 'Value': 'test-value'}]
@@ -151,6 +411,13 @@ class CoalesceCopyUserTags(BaseTest):
         self.assertTrue({'Key': 'test-key-1', 'Value': 'test-value'} in final_tags)
         self.assertTrue({'Key': 'test-key', 'Value': 'test-value-user'} in final_tags)
 
+    def test_user_tags_list_not_mutated(self):
+        resource = {'Tags': [{'Key': 'test-key', 'Value': 'test-value'}]}
+        user_tags = [{'Key': 'user-key', 'Value': 'user-value'}]
+        final_tags = coalesce_copy_user_tags(resource, True, user_tags)
+        self.assertEqual(len(final_tags), 2)
+        self.assertEqual(user_tags, [{'Key': 'user-key', 'Value': 'user-value'}])
+
     def test_empty_response(self):
         resource = {}
         user_tags = {}
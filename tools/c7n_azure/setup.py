@@ -78,7 +78,7 @@ setup(
                       "azure-cli-core",
                       "adal",
                       "backports.functools_lru_cache",
-                      "futures>=3.1.1"],
+                      'futures>=3.1.1; python_version < "3.0"'],
     package_data={str(''): [str('function_binding_resources/bin/*.dll'),
                             str('function_binding_resources/*.csproj'),
                             str('function_binding_resources/bin/*.json')]}